@@ -0,0 +1,5 @@
+"""Performance benchmarks of Adsorbase on synthetic databases.
+
+    python -m benchmarks.suite --sizes 1e3 1e5 1e6 --output results.json
+    python -m benchmarks.startup
+"""
@@ -0,0 +1,39 @@
+"""Synthetic adsorbent databases with the schema of `utils.column_titles`."""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import adsorbase.utils as utils
+
+# Rows generated at once while writing a database, to bound the memory used
+_CHUNK_ROWS = 1_000_000
+
+
+def synthetic_rows(n_rows: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    """`n_rows` adsorbents resembling the default database: each row is a
+    random row of it, with its numeric values scaled by up to ±20 %.
+
+    Missing values are kept where the default database has them, so the
+    proportion of incomplete rows is the same."""
+    base = utils.load_df()
+    rng = np.random.default_rng([seed, start])
+    data = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+
+    columns = utils.column_titles
+    data[columns[0]] = [f'Synthetic {i}' for i in range(start, start + n_rows)]
+    for col in columns[2:]:
+        data[col] = (data[col] * rng.uniform(0.8, 1.2, n_rows)).round(4)
+    return data
+
+
+def write_database(path: str | Path, n_rows: int, seed: int = 0) -> Path:
+    """Write a synthetic database of `n_rows` adsorbents as a CSV file, in
+    the format of custom.csv, generating it chunk by chunk."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(','.join(utils.column_titles) + '\n')
+        for start in range(0, n_rows, _CHUNK_ROWS):
+            chunk = synthetic_rows(min(_CHUNK_ROWS, n_rows - start), seed, start)
+            chunk.to_csv(file, header=False, index=False, lineterminator='\n')
+    return path
@@ -0,0 +1,93 @@
+"""Import time and time to the first responses of the app.
+
+Every measure is taken in a fresh interpreter, as nothing is cached yet on
+the first start. Run from the root of the repository:
+
+    python benchmarks/startup.py --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_IMPORT = '''
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+'''
+
+# The first page load: the page, its layout, then the callbacks it fires
+_FIRST_RESPONSE = '''
+import json, time
+start = time.perf_counter()
+from adsorbase.app import create_app
+app = create_app({{'warm_up': {warm_up}}})
+created = time.perf_counter()
+time.sleep({idle})
+
+client = app.server.test_client()
+loaded = time.perf_counter()
+client.get('/')
+client.get('/_dash-layout')
+
+def post(output, inputs, state=()):
+    outputs = [{{'id': key.rsplit('.', 1)[0], 'property': key.rsplit('.', 1)[1]}}
+               for key in output.strip('.').split('...')]
+    response = client.post('/_dash-update-component', json={{
+        'output': output,
+        'outputs': outputs if output.startswith('..') else outputs[0],
+        'inputs': inputs, 'state': list(state), 'changedPropIds': []}})
+    assert response.status_code == 200, response.data
+
+post('..Temp-slider.min...Temp-slider.max...Pressure-slider.min...Pressure-slider.max..',
+     [{{'id': 'actualize-btn', 'property': 'n_clicks', 'value': 0}}])
+settled = {{'id': 'settled-ranges', 'property': 'data', 'value': None}}
+post('indicator-graphic.figure', [
+    {{'id': 'xaxis-column', 'property': 'value', 'value': 'Pore volume [cm³/g]'}},
+    {{'id': 'yaxis-column', 'property': 'value', 'value': 'BET Surface Area [m²/g]'}},
+    settled,
+    {{'id': 'actualize-btn', 'property': 'n_clicks', 'value': 0}},
+    {{'id': 'view-state', 'property': 'data', 'value': None}},
+    {{'id': 'pareto-columns', 'property': 'value', 'value': []}}], [
+    {{'id': 'hover-dropdown', 'property': 'value', 'value': []}},
+    {{'id': {{'aio_id': 'theme', 'component': 'ThemeSwitchAIO', 'subcomponent': 'switch'}},
+      'property': 'value', 'value': True}}])
+done = time.perf_counter()
+print(json.dumps({{'create_app': created - start, 'first_response': done - loaded}}))
+'''
+
+
+def _run(code: str) -> str:
+    return subprocess.run([sys.executable, '-c', code], check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--idle', type=float, default=2.0,
+                        help='seconds between creating the app and the first '
+                             'request, during which it can warm up')
+    args = parser.parse_args()
+
+    samples: dict[str, list[float]] = {}
+    for _ in range(args.repeat):
+        for module in ('adsorbase', 'adsorbase.app'):
+            samples.setdefault(f'import {module}', []).append(
+                float(_run(_IMPORT.format(module=module))))
+        for warm_up in (False, True):
+            result = json.loads(_run(_FIRST_RESPONSE.format(
+                warm_up=warm_up, idle=args.idle)))
+            for name, seconds in result.items():
+                label = name + (' (warm up)' if warm_up else '')
+                samples.setdefault(label, []).append(seconds)
+
+    print(json.dumps({name: statistics.median(values)
+                      for name, values in samples.items()}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
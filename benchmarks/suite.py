@@ -0,0 +1,219 @@
+"""Time the data access and the callbacks of the app on synthetic databases
+of increasing size, and record their memory peaks.
+
+The callbacks are called directly, through the functions registered on the
+app, with the same arguments as the browser would send. Everything runs in
+a temporary home directory, so the database of the user is left untouched.
+
+    python -m benchmarks.suite --sizes 1e3 1e4 1e5 1e6 --output results.json
+    python -m benchmarks.suite --compare old.json new.json
+"""
+
+from contextvars import copy_context
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+import adsorbase
+import adsorbase.callbacks as callbacks
+import adsorbase.utils as utils
+from adsorbase.app import create_app
+from adsorbase.config import settings
+from adsorbase.export import download_filtered_data
+from .data import write_database
+
+X_COL = 'Pore volume [cm³/g]'
+Y_COL = 'BET Surface Area [m²/g]'
+
+
+def _raw_callbacks(app) -> dict:
+    """Functions of the server-side callbacks of `app`, by name"""
+    return {entry['callback'].__wrapped__.__name__: entry['callback'].__wrapped__
+            for entry in app.callback_map.values() if 'callback' in entry}
+
+
+def _call(callback, trigger: str, *args):
+    """Call a callback as if the input `trigger` changed"""
+    def run():
+        context_value.set(AttributeDict(
+            triggered_inputs=[{'prop_id': trigger, 'value': None}]))
+        return callback(*args)
+    return copy_context().run(run)
+
+
+def measure(run, repeat: int, setup=None) -> dict:
+    """Median and minimum time of `repeat` runs of `run`, after `setup`
+    each time, and the peak of memory allocated by one more run."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': statistics.median(times), 'min_seconds': min(times),
+            'repeat': repeat, 'peak_bytes': peak}
+
+
+def _selection(data) -> dict:
+    """Interquartile temperature and pressure ranges, as settled sliders"""
+    t = data['Conditions T [K]'].quantile([0.25, 0.75]).tolist()
+    p = data['Conditions P [bar]'].quantile([0.25, 0.75]).tolist()
+    return {'t': t, 'p': p, 'seq': 0, 'session': 'benchmark'}
+
+
+def run_size(app, n_rows: int, repeat: int, home: Path) -> dict:
+    """Benchmarks of a database of `n_rows` synthetic adsorbents"""
+    os.environ['HOME'] = os.environ['USERPROFILE'] = str(home)
+    write_database(home / '.adsorbase' / 'custom.csv', n_rows)
+    funcs = _raw_callbacks(app)
+
+    # Convert the database to the configured storage beforehand
+    utils._store.invalidate()
+    data = utils.current_data()
+    settled = _selection(data)
+    t_range, p_range = settled['t'], settled['p']
+    results = {}
+
+    results['current_data (cold)'] = measure(
+        utils.current_data, repeat, setup=utils._store.invalidate)
+    results['current_data'] = measure(utils.current_data, repeat)
+    results['query_rows (cold index)'] = measure(
+        lambda: utils.query_rows(t_range, p_range, X_COL, Y_COL), repeat,
+        setup=lambda: (utils._store.invalidate(), utils.current_data()))
+    results['query_rows'] = measure(
+        lambda: utils.query_rows(t_range, p_range, X_COL, Y_COL), repeat)
+
+    def update_graph():
+        return _call(funcs['update_graph'], 'settled-ranges.data',
+                     X_COL, Y_COL, settled, 0, None, [], [], True)
+    results['update_graph'] = measure(
+        update_graph, repeat, setup=callbacks._figures.clear)
+    results['update_graph (cached)'] = measure(update_graph, repeat)
+    fig = update_graph()
+    results['figure to_json'] = measure(fig.to_json, repeat)
+    results['figure to_json']['bytes'] = len(fig.to_json())
+
+    def update_table(sort_by):
+        return _call(funcs['update_table'], 'view-state.data',
+                     None, 0, 10, sort_by, '', settled, X_COL, Y_COL)
+    # The point count is computed by update_table
+    results['update_table'] = measure(lambda: update_table([]), repeat)
+    results['update_table (sorted)'] = measure(lambda: update_table(
+        [{'column_id': Y_COL, 'direction': 'desc'}]), repeat)
+    results['type_statistics'] = measure(
+        lambda: utils.type_statistics(X_COL, Y_COL), repeat)
+    results['type_statistics (selection)'] = measure(
+        lambda: utils.type_statistics(X_COL, Y_COL, t_range, p_range), repeat)
+    results['pareto_rows'] = measure(
+        lambda: utils.pareto_rows(None, t_range, p_range), repeat)
+    results['rank_adsorbents'] = measure(
+        lambda: utils.rank_adsorbents(t_range=t_range, p_range=p_range, limit=100), repeat)
+
+    query = (f'/download/filtered_data?format=csv&t_min={t_range[0]}&t_max={t_range[1]}'
+             f'&p_min={p_range[0]}&p_max={p_range[1]}&x={X_COL}&y={Y_COL}')
+
+    def export():
+        with app.server.test_request_context(query):
+            return b''.join(download_filtered_data().response)
+    results['export csv'] = measure(export, repeat)
+    results['export csv']['bytes'] = len(export())
+
+    # Last, as it grows the database
+    row = data.iloc[0]
+    results['insert_into_csv'] = measure(
+        lambda: utils.insert_into_csv(*row.tolist()), repeat)
+
+    return results
+
+
+def run(sizes: list[int], repeat: int) -> dict:
+    app = create_app({'warm_up': False, 'figure_cache_bytes': 64 * 2**20})
+    home = os.environ.get('HOME'), os.environ.get('USERPROFILE')
+    results = {}
+    try:
+        for n_rows in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                print(f'{n_rows} rows...', flush=True)
+                results[str(n_rows)] = run_size(app, n_rows, repeat, Path(tmp))
+    finally:
+        for name, value in zip(('HOME', 'USERPROFILE'), home):
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        utils._store.invalidate()
+
+    return {
+        'adsorbase': adsorbase.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {key: settings[key] for key in (
+            'storage', 'point_budget', 'render_mode', 'figure_cache_bytes')},
+        'results': results,
+    }
+
+
+def compare(old: dict, new: dict) -> str:
+    """Table of the times of `new` relative to `old`, for the benchmarks
+    found in both."""
+    lines = [f'{"rows":>10}  {"benchmark":<26}{"old [s]":>10}{"new [s]":>10}{"ratio":>8}']
+    for size, benches in new['results'].items():
+        for name, result in benches.items():
+            before = old['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+            lines.append(f'{size:>10}  {name:<26}{before["seconds"]:>10.4f}'
+                         f'{result["seconds"]:>10.4f}{ratio:>8.2f}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=float,
+                        default=[1e3, 1e4, 1e5, 1e6],
+                        help='numbers of rows of the databases, up to 1e7')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--storage', default=settings['storage'],
+                        help='storage of the custom database')
+    parser.add_argument('--output', type=Path,
+                        help='JSON file to write the results to')
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.loads(path.read_text()) for path in args.compare)
+        print(compare(old, new))
+        return
+
+    settings['storage'] = args.storage
+    results = run([int(size) for size in args.sizes], args.repeat)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,93 @@
+from pathlib import Path
+import threading
 from .callbacks import register_callbacks
+from .config import configure, settings
+from .export import register_routes
+from .users import register_user_cookie
+from . import metrics
 from dash import Dash
 import dash_bootstrap_components as dbc
+from flask import Flask
 
-app = Dash(__name__, external_stylesheets=[dbc.themes.COSMO])
 
-# Import layout AFTER app initialisation to avoid circular imports
-from .layout import full_layout
+def _background_manager():
+    """DiskCache manager running the background callbacks in local
+    processes, or None if they are disabled."""
+    if not settings['background_callbacks']:
+        return None
 
-app.layout = full_layout
+    import diskcache
+    from dash import DiskcacheManager
 
-register_callbacks(app)
+    cache = diskcache.Cache(Path.home() / '.adsorbase' / 'cache' / 'callbacks')
+    return DiskcacheManager(cache)
+
+
+_layout_lock = threading.Lock()
+
+
+def _load_layout(app: Dash) -> None:
+    with _layout_lock:
+        if app.layout is None:
+            # Imported here, as the theme switch needs the app to exist
+            from .layout import full_layout
+            app.layout = full_layout
+
+
+def warm_up(app: Dash) -> None:
+    """Build the layout of `app`, load the data and its index, so that they
+    are ready for the first request."""
+    from . import callbacks, utils
+
+    _load_layout(app)
+    callbacks._load_figure_templates()
+    utils.query_rows()
+
+
+def create_app(config: dict | None = None) -> Dash:
+    """Create the Dash app, after updating the settings of
+    `adsorbase.config` with `config`.
+
+    Nothing is loaded until the first request, or in a background thread
+    if the `warm_up` setting is on."""
+    configure(**(config or {}))
+
+    # The layout is only built once needed, as its theme switch registers
+    # all the figure templates, which takes seconds. It must be set before
+    # Dash sets itself up on the first request, hence a server of our own,
+    # on which this hook runs first.
+    server = Flask(__name__)
+    server.before_request(lambda: _load_layout(app))
+    server.config['SEND_FILE_MAX_AGE_DEFAULT'] = settings['assets_max_age']
+    app = Dash(__name__, server=server,
+               external_stylesheets=[dbc.themes.COSMO],
+               background_callback_manager=_background_manager(),
+               compress=settings['compress'])
+
+    register_callbacks(app)
+    register_routes(app.server)
+    register_user_cookie(app.server)
+    if settings['instrument']:
+        metrics.instrument(app)
+    if settings['profile_dir']:
+        metrics.register_profiler(app.server, settings['profile_dir'])
+
+    if settings['background_callbacks']:
+        # Background jobs run in processes forked from this one, which start
+        # from a copy of its memory: the data is loaded here before any job
+        # starts, rather than in every job. Once loaded, this takes no time.
+        server.before_request(lambda: warm_up(app))
+    if settings['warm_up']:
+        threading.Thread(target=warm_up, args=(app,),
+                         name='adsorbase-warm-up', daemon=True).start()
+    return app
+
+
+def __getattr__(name: str):
+    # `adsorbase.app.app` is created on first access, with the settings
+    # configured by then
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,39 @@
+// Clientside callbacks of the temperature and pressure sliders
+
+(function () {
+    // Identifies the page to the server, which drops the requests made
+    // for slider positions that were already left
+    var session = Date.now().toString(36) + Math.random().toString(36).slice(2);
+    var seq = 0;
+    var lastSent = 0;
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside);
+    window.dash_clientside.adsorbase = Object.assign({}, window.dash_clientside.adsorbase, {
+
+        // Coalesce the positions of the sliders while they are dragged: at
+        // most one every `interval` milliseconds is sent to the server, and
+        // only the latest, so the last position is always applied
+        settle_ranges: function (tRange, pRange, interval) {
+            var current = ++seq;
+            var wait = Math.max(0, lastSent + interval - Date.now());
+            return new Promise(function (resolve) {
+                setTimeout(function () {
+                    if (current !== seq) {
+                        resolve(window.dash_clientside.no_update);
+                        return;
+                    }
+                    lastSent = Date.now();
+                    resolve({t: tRange, p: pRange, seq: current, session: session});
+                }, wait);
+            });
+        },
+
+        // Text of the label of a slider, updated without a server round trip
+        format_range: function (range) {
+            if (!range) {
+                return '';
+            }
+            return ': ' + range[0] + ' to ' + range[1];
+        }
+    });
+})();
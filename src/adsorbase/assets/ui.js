@@ -0,0 +1,21 @@
+// Clientside callbacks which only reshape data the browser already has.
+// Their reference implementations are the functions of the same name in
+// adsorbase/callbacks.py
+
+(function () {
+    window.dash_clientside = Object.assign({}, window.dash_clientside);
+    window.dash_clientside.adsorbase = Object.assign({}, window.dash_clientside.adsorbase, {
+
+        // Columns which can be shown on hover, i.e. all but the axes
+        update_hover_dropdown: function (xAxis, yAxis, columns) {
+            return (columns || [])
+                .filter(function (col) { return col !== xAxis && col !== yAxis; })
+                .map(function (col) { return {label: col, value: col}; });
+        },
+
+        // Empty the fields of the form once an adsorbent is submitted
+        clear_fields: function () {
+            return ['', '', null, null, null, null, null];
+        }
+    });
+})();
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+import threading
+import numpy as np
+import plotly.graph_objects as go
+from .config import settings
+
+
+def figure_nbytes(fig: go.Figure) -> int:
+    """Approximate size of the data arrays of a figure, in bytes."""
+    size = 0
+    for trace in fig.data:
+        for attr in ('x', 'y', 'customdata', 'hovertext'):
+            values = getattr(trace, attr, None)
+            if values is None:
+                continue
+            values = np.asarray(values)
+            if values.dtype == object:
+                size += sum(len(str(value)) for value in values.ravel())
+            else:
+                size += values.nbytes
+    return size
+
+
+class FigureCache:
+    """Least recently used cache of figures, bounded by the total size of
+    their data given by the `figure_cache_bytes` setting.
+
+    Cached figures are shared between callers and must not be modified."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._figures: OrderedDict[Hashable, tuple[go.Figure, int]] = OrderedDict()
+        self.nbytes = 0
+
+    def get(self, key: Hashable) -> go.Figure | None:
+        with self._lock:
+            if key not in self._figures:
+                return None
+            self._figures.move_to_end(key)
+            return self._figures[key][0]
+
+    def put(self, key: Hashable, fig: go.Figure) -> None:
+        max_bytes = settings['figure_cache_bytes']
+        size = figure_nbytes(fig)
+        if size > max_bytes:
+            return
+
+        with self._lock:
+            if key in self._figures:
+                self.nbytes -= self._figures.pop(key)[1]
+            self._figures[key] = (fig, size)
+            self.nbytes += size
+
+            while self.nbytes > max_bytes:
+                _, (_, evicted) = self._figures.popitem(last=False)
+                self.nbytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
+            self.nbytes = 0
+
+
+class RequestSequence:
+    """Latest sequence number received from each page, to drop the requests
+    overtaken by newer ones while they were queued or running.
+
+    Only the `max_sessions` most recent pages are remembered."""
+
+    def __init__(self, max_sessions: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._latest: OrderedDict[str, int] = OrderedDict()
+        self.max_sessions = max_sessions
+
+    def claim(self, session: str, seq: int) -> bool:
+        """Record `seq` for `session`, and tell whether it is still the
+        latest one, i.e. no newer request was received."""
+        with self._lock:
+            latest = self._latest.get(session, seq)
+            if seq >= latest:
+                self._latest[session] = seq
+            self._latest.move_to_end(session)
+            while len(self._latest) > self.max_sessions:
+                self._latest.popitem(last=False)
+            return seq >= latest
@@ -1,15 +1,326 @@
-from dash import Dash, Input, Output, State, html, dcc, dash_table
+from dash import Dash, Input, Output, State, Patch, ClientsideFunction, html, ctx
 from dash.exceptions import PreventUpdate
 import adsorbase.utils as utils
+from adsorbase.config import render_mode, settings
+from adsorbase.cache import FigureCache, RequestSequence
+from adsorbase.export import download_url
+from adsorbase.users import user_id
 from numpy import floor, ceil
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import pandas as pd
 from dash_bootstrap_templates import ThemeSwitchAIO, load_figure_template
-from typing import Any
+import dash_bootstrap_components as dbc
+import base64
+from functools import cache
+import io
+import json
 
-df = utils.load_df()
-data_options = utils.column_titles[2:]
+_figures = FigureCache()
+_sequences = RequestSequence()
+_THEME_SWITCH = json.dumps(ThemeSwitchAIO.ids.switch('theme'), separators=(',', ':'), sort_keys=True)
 
-load_figure_template(['cosmo', 'darkly'])
+# Zoom window and hidden adsorbent types of the graph
+_DEFAULT_VIEW = {'x_range': None, 'y_range': None, 'hidden': []}
+
+
+def _bucket_range(value_range) -> tuple | None:
+    '''Slider range as a cache key. The sliders have no step, so they only
+    stop on their marks, and rounding is enough to map equal positions to
+    the same key.'''
+    if not value_range:
+        return None
+    return tuple(round(float(value), 6) for value in value_range)
+
+
+def _settled_ranges(settled: dict | None) -> tuple:
+    '''Temperature and pressure ranges of the last settled slider positions'''
+    settled = settled or {}
+    return settled.get('t'), settled.get('p')
+
+
+def _shares_memory() -> bool:
+    '''Whether the callbacks run in the server process, whose figure cache
+    and sequence numbers then see every request. Background callbacks run
+    in a new process each, whose changes to them would be lost, and Dash
+    cancels their superseded jobs itself.'''
+    return not settings['background_callbacks']
+
+
+def _superseded(settled: dict | None) -> bool:
+    '''Whether newer slider positions were sent by the same page, in which
+    case the request for `settled` is stale and its result would be
+    discarded'''
+    if not settled or not _shares_memory():
+        return False
+    return not _sequences.claim(settled['session'], settled['seq'])
+
+
+def _user() -> str | None:
+    '''User of the running callback, whose own rows are shown along with
+    the shared ones'''
+    return user_id(ctx.cookies, ctx.headers)
+
+
+def _unidentified_user_error() -> html.Span | None:
+    '''Error shown instead of adding rows when the app is shared but the
+    user of the running callback is unknown, e.g. without cookies or without
+    the `user_header` header, as their rows would go to the shared database'''
+    if not settings['multi_user'] or _user() is not None:
+        return None
+    message = 'Error : Nothing was added, as your user could not be identified'
+    if not settings['user_header']:
+        message += '. Please enable cookies and reload the page'
+    return html.Span(message, style={'color': 'red'})
+
+
+def _normalize_view(view: dict | None) -> tuple:
+    '''View state as a cache key'''
+    view = view or _DEFAULT_VIEW
+    return (_bucket_range(view['x_range']), _bucket_range(view['y_range']),
+            tuple(sorted(view['hidden'])))
+
+
+def _plot_rows(t_range, p_range, x_col: str, y_col: str, view: dict | None,
+               user: str | None = None) -> tuple[pd.DataFrame, np.ndarray, int, bool]:
+    '''Current data, positions of the rows drawn on the graph, number of
+    points they stand for and whether the graph is reduced.
+
+    Up to the point budget, every row within the slider ranges is drawn.
+    Above it, the graph is reduced: only a stratified sample of the zoom
+    window is drawn, which becomes the full resolution once zoomed in enough.'''
+    view = view or _DEFAULT_VIEW
+    budget = settings['point_budget']
+
+    data, rows = utils.query_rows(t_range, p_range, x_col, y_col, user=user)
+    if len(rows) <= budget:
+        total = len(rows)
+        data, rows = utils.query_rows(t_range, p_range, user=user)
+        return data, rows, total, False
+
+    # One row of each type, so that the legend keeps all the types when
+    # they are outside of the zoom window
+    types = data['Type of Adsorbent'].iloc[rows].reset_index(drop=True)
+    anchors = rows[types.drop_duplicates().index.to_numpy()]
+
+    data, window = utils.query_rows(t_range, p_range, x_col, y_col,
+                                    view['x_range'], view['y_range'], user=user)
+    sample = utils.sample_rows(data, window, budget)
+    return data, np.union1d(sample, anchors), len(window), True
+
+
+@cache
+def _load_figure_templates() -> None:
+    '''Register the figure templates of the themes, once they are needed'''
+    load_figure_template(['bootstrap', 'darkly'])
+
+
+def _plot_template(theme: bool) -> str:
+    _load_figure_templates()
+    return 'bootstrap' if theme else 'darkly'
+
+
+def _hover_columns(selected_hover_data: list[str] | None, x_col: str, y_col: str) -> list[str]:
+    '''Columns shown on hover besides the axes'''
+    return [col for col in selected_hover_data or [] if col not in (x_col, y_col)]
+
+
+def _hovertemplate(x_col: str, y_col: str, hover_columns: list[str]) -> str:
+    '''Hover text of the points, whose customdata holds the row id followed
+    by the `hover_columns`'''
+    additional_hover = ''
+    for index, data_name in enumerate(hover_columns, start=1):
+        additional_hover += f'{data_name}' + \
+            f' : %{{customdata[{index}]:.2f}} <br>'
+
+    return (
+        '<b>%{hovertext}</b><br>' +
+        '<i>%{fullData.name}</i><br><br>' +
+        f'{x_col}' + ' : %{x:.2f} <br>' +
+        f'{y_col}' + ' : %{y:.2f} <br>' +
+        additional_hover + '<extra></extra>'
+    )
+
+
+def _pareto_trace(data, rows: np.ndarray, x_col: str, y_col: str, webgl: bool):
+    '''Trace circling the `rows` of the Pareto front, drawn after the traces
+    of the adsorbent types so that their indexes are left unchanged. Its
+    customdata only holds the row ids.'''
+    front = data[list(dict.fromkeys([utils.column_titles[0], x_col, y_col]))].iloc[rows]
+    return (go.Scattergl if webgl else go.Scatter)(
+        x=front[x_col],
+        y=front[y_col],
+        hovertext=front[utils.column_titles[0]],
+        customdata=rows[:, np.newaxis],
+        hovertemplate=_hovertemplate(x_col, y_col, []),
+        name='Pareto front',
+        mode='markers',
+        marker={'symbol': 'circle-open', 'size': 16, 'color': 'crimson',
+                'line': {'width': 2}}
+    )
+
+
+_FILTER_OPERATORS = [['ge ', '>='], ['le ', '<='], ['lt ', '<'], ['gt ', '>'],
+                     ['ne ', '!='], ['eq ', '='], ['contains '],
+                     ['datestartswith ']]
+
+
+def _split_filter_part(filter_part: str) -> tuple:
+    '''Column, operator and value of one condition of a table filter query.
+    The value is kept as typed, and only read as a number to compare it
+    with a numeric column.'''
+    for operator_type in _FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+
+                value_part = value_part.strip()
+                v0 = value_part[:1]
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1:-1].replace('\\' + v0, v0)
+                else:
+                    value = value_part
+
+                return name, operator_type[0].strip(), value
+
+    return (None, None, None)
+
+
+def _table_filter_mask(data: pd.DataFrame, rows: np.ndarray, filter_query: str) -> np.ndarray:
+    '''Which of the `rows` positions of `data` match the filter query of
+    the table. Only the filtered columns of these rows are read.'''
+    mask = np.ones(len(rows), dtype=bool)
+    for filter_part in filter_query.split(' && '):
+        col_name, operator, value = _split_filter_part(filter_part)
+        if col_name not in data.columns:
+            continue
+
+        column = data[col_name].iloc[rows]
+        if operator in ('contains', 'datestartswith'):
+            mask &= column.astype(str).str.contains(
+                value, case=False, regex=False).to_numpy()
+            continue
+
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            try:
+                # In the precision of the column, for 6.9 to equal its values
+                value = column.dtype.type(float(value))
+            except ValueError:
+                # Text never equals a number, and is not ordered with them
+                if operator == 'eq':
+                    mask[:] = False
+                continue
+        else:
+            # Names and types are compared as text, in alphabetical order
+            column = column.astype(str)
+        mask &= getattr(column, operator)(value).to_numpy()
+
+    return mask
+
+
+def _sorted_rows(data: pd.DataFrame, rows: np.ndarray, sort_by: list[dict]) -> np.ndarray:
+    '''`rows` positions of `data` in the order of the table columns
+    `sort_by`'''
+    columns = [col['column_id'] for col in sort_by]
+    keys = data[columns].iloc[rows].reset_index(drop=True)
+    order = keys.sort_values(
+        columns,
+        ascending=[col['direction'] == 'asc' for col in sort_by],
+        kind='stable'
+    ).index.to_numpy()
+    return rows[order]
+
+
+def _table_records(page: pd.DataFrame) -> list[dict]:
+    '''Rows of a page of the table, with the float32 values in their
+    shortest decimal form, e.g. 6.9 rather than 6.900000095367432'''
+    records = page.to_dict('records')
+    for col in page.select_dtypes('float32').columns:
+        for record, value in zip(records, page[col].to_numpy()):
+            record[col] = float(str(value))
+    return records
+
+
+def _statistics_table(statistics: pd.DataFrame, x_col: str, y_col: str) -> dbc.Table | None:
+    '''Table of the statistics of each adsorbent type, from
+    `utils.type_statistics`'''
+    if statistics.empty:
+        return None
+
+    def number(value) -> str:
+        return '-' if pd.isna(value) else f'{value:.4g}'
+
+    header = html.Thead([
+        html.Tr([html.Th('Type of Adsorbent', rowSpan=2), html.Th('Count', rowSpan=2),
+                 html.Th(x_col, colSpan=4), html.Th(y_col, colSpan=4),
+                 html.Th('Correlation', rowSpan=2)]),
+        html.Tr([html.Th(name) for name in ('min', 'max', 'mean', 'median') * 2])
+    ])
+    body = html.Tbody([
+        html.Tr([html.Td(ads_type), html.Td(int(row['count']))] +
+                [html.Td(number(value)) for value in row.iloc[1:]])
+        for ads_type, row in statistics.iterrows()
+    ])
+    return dbc.Table([header, body], size='sm', striped=True, hover=True,
+                     responsive=True)
+
+
+def _apply_relayout(relayout_data: dict | None, view: dict) -> dict:
+    '''Zoom window after a relayout event of the graph'''
+    ranges = {}
+    if not relayout_data:
+        return ranges
+
+    for axis in ('x', 'y'):
+        if relayout_data.get(f'{axis}axis.autorange'):
+            ranges[f'{axis}_range'] = None
+        elif f'{axis}axis.range[0]' in relayout_data:
+            ranges[f'{axis}_range'] = [relayout_data[f'{axis}axis.range[0]'],
+                                       relayout_data[f'{axis}axis.range[1]']]
+        elif f'{axis}axis.range' in relayout_data:
+            ranges[f'{axis}_range'] = list(relayout_data[f'{axis}axis.range'])
+
+    return ranges
+
+
+def _apply_restyle(restyle_data: list | None, types: list[str], hidden: list[str]) -> list[str]:
+    '''Hidden adsorbent types after a restyle event of the graph'''
+    if not restyle_data or 'visible' not in restyle_data[0]:
+        return hidden
+
+    update, indices = restyle_data
+    values = update['visible']
+    if len(values) == 1:
+        values = values * len(indices)
+
+    hidden = set(hidden)
+    for i, value in zip(indices, values):
+        if i >= len(types):
+            continue
+        if value in (False, 'legendonly'):
+            hidden.add(types[i])
+        else:
+            hidden.discard(types[i])
+
+    return sorted(hidden)
+
+
+# Reference implementations of the clientside callbacks of assets/ui.js
+
+def update_hover_dropdown(x_axis: str | None, y_axis: str | None) -> list[dict]:
+    '''Options of the hover dropdown: all the columns but the axes'''
+    hover_candidates = [
+        col for col in utils.column_titles[2:] if col not in (x_axis, y_axis)]
+
+    return [{'label': col, 'value': col} for col in hover_candidates]
+
+
+def clear_fields(*_) -> list:
+    '''Values of the emptied fields of the form'''
+    return ['', ''] + [None for i in range(5)]
 
 
 def register_callbacks(app: Dash) -> None:
@@ -22,35 +333,43 @@ def register_callbacks(app: Dash) -> None:
         Input('actualize-btn', 'n_clicks')
     )
     def update_filter_range(n_clicks) -> tuple:
-        t_min = floor(df['Conditions T [K]'].min()/10)*10
-        t_max = ceil(df['Conditions T [K]'].max()/10)*10
-
-        p_min = floor(df['Conditions P [bar]'].min()/10)*10
-        p_max = ceil(df['Conditions P [bar]'].max()/10)*10
+        # The shared dataset is reloaded only when the database changed, so
+        # it is used for the initial bounds too rather than reading the CSV
+        data = utils.current_data(_user())
+        t_min = floor(data['Conditions T [K]'].min()/10)*10
+        t_max = ceil(data['Conditions T [K]'].max()/10)*10
 
-        if n_clicks:
-            data = utils.current_data()
-            try:
-                t_min = floor(data['Conditions T [K]'].min()/10)*10
-                t_max = ceil(data['Conditions T [K]'].max()/10)*10
-                p_min = floor(data['Conditions P [bar]'].min()/10)*10
-                p_max = ceil(data['Conditions P [bar]'].max()/10)*10
-            except Exception as e:
-                print('Error updating sliders:', e)
+        p_min = floor(data['Conditions P [bar]'].min()/10)*10
+        p_max = ceil(data['Conditions P [bar]'].max()/10)*10
 
         return (t_min, t_max, p_min, p_max)
 
-    # Callback to update hover dropdown options
-    @app.callback(
+    # Clientside callbacks of the sliders, in assets/sliders.js. The labels
+    # follow the sliders as they are dragged, while the graph and the table
+    # are only updated for the settled positions
+    app.clientside_callback(
+        ClientsideFunction(namespace='adsorbase', function_name='settle_ranges'),
+        Output('settled-ranges', 'data'),
+        Input('Temp-slider', 'value'),
+        Input('Pressure-slider', 'value'),
+        State('slider-interval', 'data')
+    )
+
+    for slider in ('Temp', 'Pressure'):
+        app.clientside_callback(
+            ClientsideFunction(namespace='adsorbase', function_name='format_range'),
+            Output(f'{slider}-range', 'children'),
+            Input(f'{slider}-slider', 'value')
+        )
+
+    # Callback to update hover dropdown options, in assets/ui.js
+    app.clientside_callback(
+        ClientsideFunction(namespace='adsorbase', function_name='update_hover_dropdown'),
         Output('hover-dropdown', 'options'),
         Input('xaxis-column', 'value'),
-        Input('yaxis-column', 'value')
+        Input('yaxis-column', 'value'),
+        State('hover-columns', 'data')
     )
-    def update_hover_dropdown(x_axis, y_axis):
-        hover_candidates = [
-            col for col in data_options if col not in (x_axis, y_axis)]
-
-        return [{'label': col, 'value': col} for col in hover_candidates]
 
 
     # Callback to update graph
@@ -58,29 +377,60 @@ def register_callbacks(app: Dash) -> None:
         Output('indicator-graphic', 'figure'),
         Input('xaxis-column', 'value'),
         Input('yaxis-column', 'value'),
-        Input('hover-dropdown', 'value'),
-        Input('Temp-slider', 'value'),
-        Input('Pressure-slider', 'value'),
-        Input(ThemeSwitchAIO.ids.switch('theme'), 'value'),
-        Input('actualize-btn', 'n_clicks')
+        Input('settled-ranges', 'data'),
+        Input('actualize-btn', 'n_clicks'),
+        Input('view-state', 'data'),
+        Input('pareto-columns', 'value'),
+        State('hover-dropdown', 'value'),
+        State(ThemeSwitchAIO.ids.switch('theme'), 'value'),
+        background=settings['background_callbacks']
     )
-    def update_graph(xaxis_column_name, yaxis_column_name, selected_hover_data, t_range, p_range, theme, n_clicks):
+    def update_graph(xaxis_column_name, yaxis_column_name, settled, n_clicks, view, pareto_columns, selected_hover_data, theme):
         if not xaxis_column_name or not yaxis_column_name:
             raise PreventUpdate
+        if _superseded(settled):
+            raise PreventUpdate
+        t_range, p_range = _settled_ranges(settled)
+        user = _user()
+
+        # Only send the columns shown on hover, and the row ids to look up
+        # the other ones on click
+        hover_columns = _hover_columns(
+            selected_hover_data, xaxis_column_name, yaxis_column_name)
+
+        # Figures within the point budget do not depend on the view, so they
+        # are cached without it
+        key = (utils.data_version(user), xaxis_column_name, yaxis_column_name,
+               tuple(hover_columns), _bucket_range(t_range),
+               _bucket_range(p_range), bool(theme),
+               tuple(sorted(pareto_columns or [])))
+        view_key = key + (_normalize_view(view),)
+        cached = _shares_memory()
+        fig = _figures.get(key) if cached else None
+        if fig is not None:
+            # Zooming and legend clicks only need new points on a reduced figure
+            if ctx.triggered_id == 'view-state':
+                raise PreventUpdate
+            return fig
+        fig = _figures.get(view_key) if cached else None
+        if fig is not None:
+            return fig
+
+        data, rows, total, reduced = _plot_rows(
+            t_range, p_range, xaxis_column_name, yaxis_column_name, view, user)
+
+        if ctx.triggered_id == 'view-state' and not reduced:
+            raise PreventUpdate
+        if _superseded(settled):
+            raise PreventUpdate
+        columns = list(dict.fromkeys(
+            utils.column_titles[:2] + [xaxis_column_name, yaxis_column_name] + hover_columns))
+        filtered_df = data[columns].iloc[rows].assign(row_id=rows)
 
-        filtered_df = utils.current_data()
-        if t_range:
-            filtered_df = filtered_df[
-                (t_range[0] <= filtered_df['Conditions T [K]']) &
-                (filtered_df['Conditions T [K]'] <= t_range[1])
-            ]
-        if p_range:
-            filtered_df = filtered_df[
-                (p_range[0] <= filtered_df['Conditions P [bar]']) &
-                (filtered_df['Conditions P [bar]'] <= p_range[1])
-            ]
-
-        plot_template = 'bootstrap' if theme else 'darkly'
+        title = f'{yaxis_column_name} as a function of {xaxis_column_name}'
+        if len(rows) < total:
+            title += f'<br><sup>Showing {len(rows)} of {total} points, ' + \
+                'zoom in for full resolution</sup>'
 
         fig = px.scatter(
             filtered_df,
@@ -90,10 +440,11 @@ def register_callbacks(app: Dash) -> None:
             color=filtered_df.columns[1],
             symbol='Type of Adsorbent',
             hover_name=filtered_df.columns[0],
-            title=f'{yaxis_column_name} as a function of {xaxis_column_name}',
-            custom_data=list(filtered_df.head(1)),
-            template=plot_template,
-            color_discrete_sequence=px.colors.qualitative.Vivid
+            title=title,
+            custom_data=['row_id'] + hover_columns,
+            template=_plot_template(theme),
+            color_discrete_sequence=px.colors.qualitative.Vivid,
+            render_mode=render_mode(len(filtered_df))
         )
 
         fig.update_layout(
@@ -102,176 +453,241 @@ def register_callbacks(app: Dash) -> None:
             yaxis_autorange=True
         )
 
-        additional_hover = ''
-        if selected_hover_data:
-            for data_name in selected_hover_data:
-
-                index = utils.column_titles.index(data_name)
-                additional_hover += f'{data_name}' + \
-                    f' : %{{customdata[{index}]:.2f}} <br>'
-
         fig.update_traces(
-            hovertemplate=(
-                '<b>%{customdata[0]}</b><br>' +
-                '<i>%{customdata[1]}</i><br><br>' +
-                f'{xaxis_column_name}' + ' : %{x:.2f} <br>' +
-                f'{yaxis_column_name}' + ' : %{y:.2f} <br>' +
-                additional_hover + '<extra></extra>'
-            ),
+            hovertemplate=_hovertemplate(
+                xaxis_column_name, yaxis_column_name, hover_columns),
             mode='markers',
             marker={'sizemode': 'area',
                     'sizeref': 10,
                     'size': 8}
         )
 
+        if reduced and view:
+            # Keep the zoom window of the user on the rebuilt figure
+            if view['x_range']:
+                fig.update_layout(xaxis_range=view['x_range'],
+                                  xaxis_autorange=False)
+            if view['y_range']:
+                fig.update_layout(yaxis_range=view['y_range'],
+                                  yaxis_autorange=False)
+            fig.for_each_trace(
+                lambda trace: trace.update(visible='legendonly'),
+                selector=lambda trace: trace.name in view['hidden'])
+
+        # The front is found among all the rows within the slider ranges,
+        # so it is exact on a reduced graph too
+        if pareto_columns:
+            front_data, front = utils.pareto_rows(
+                pareto_columns, t_range, p_range, user=user)
+            fig.add_trace(_pareto_trace(
+                front_data, front, xaxis_column_name, yaxis_column_name,
+                render_mode(len(filtered_df)) == 'webgl'))
+
+        if cached:
+            _figures.put(view_key if reduced else key, fig)
         return fig
 
-    def get_traces(relayout_data, restyle_data, figure) -> tuple[list, float, float, float, float]:
-        '''Get all series on the plotly scatter, as well as the zoom limits (`x_min`, `x_max`, `y_min`, `y_max`)'''
-        visible_traces = []
+    # Callback to restyle the graph without rebuilding its traces
+    @app.callback(
+        Output('indicator-graphic', 'figure', allow_duplicate=True),
+        Input('hover-dropdown', 'value'),
+        Input(ThemeSwitchAIO.ids.switch('theme'), 'value'),
+        State('xaxis-column', 'value'),
+        State('yaxis-column', 'value'),
+        State('settled-ranges', 'data'),
+        prevent_initial_call=True
+    )
+    def patch_graph(selected_hover_data, theme, xaxis_column_name, yaxis_column_name, settled):
+        if not xaxis_column_name or not yaxis_column_name:
+            raise PreventUpdate
+        t_range, p_range = _settled_ranges(settled)
+        user = _user()
+
+        # A reduced figure is rebuilt anyway, as the reset of its zoom
+        # window changes the sampled points
+        data, rows = utils.query_rows(
+            t_range, p_range, xaxis_column_name, yaxis_column_name, user=user)
+        if len(rows) > settings['point_budget']:
+            raise PreventUpdate
 
-        # Identify the visible traces
-        if restyle_data and 'visible' in str(restyle_data):
-            for i, trace in enumerate(figure['data']):
-                if trace.get('visible', True) not in (False, 'legendonly'):
-                    visible_traces.append(i)
-        else:
-            # All the visible trace by default
-            visible_traces = list(range(len(figure['data'])))
-
-        # Extract the limits of the zoom
-        x_min = y_min = x_max = y_max = None
-        if relayout_data and ('xaxis.range[0]' in relayout_data):
-            x_min = relayout_data['xaxis.range[0]']
-            x_max = relayout_data['xaxis.range[1]']
-            y_min = relayout_data['yaxis.range[0]']
-            y_max = relayout_data['yaxis.range[1]']
-
-        # Set the limits if zoomed out
-        if x_min is None:
-            x_min = -float('inf')
-        if y_min is None:
-            y_min = -float('inf')
-        if x_max is None:
-            x_max = float('inf')
-        if y_max is None:
-            y_max = float('inf')
-
-        return (visible_traces, x_min, x_max, y_min, y_max)
-
-    # Callback to count the number of visible points on the graph
+        patch = Patch()
+        if ctx.triggered_prop_ids.get(_THEME_SWITCH + '.value'):
+            patch['layout']['template'] = pio.templates[_plot_template(theme)]
+
+        if ctx.triggered_prop_ids.get('hover-dropdown.value'):
+            hover_columns = _hover_columns(
+                selected_hover_data, xaxis_column_name, yaxis_column_name)
+            template = _hovertemplate(
+                xaxis_column_name, yaxis_column_name, hover_columns)
+
+            data, rows = utils.query_rows(t_range, p_range, user=user)
+            types = data['Type of Adsorbent'].iloc[rows].to_numpy()
+            for i, ads_type in enumerate(utils.trace_types(data, rows)):
+                trace_rows = rows[types == ads_type]
+                patch['data'][i]['customdata'] = np.column_stack(
+                    [trace_rows, data[hover_columns].iloc[trace_rows].to_numpy(dtype=float)])
+                patch['data'][i]['hovertemplate'] = template
+
+        return patch
+
+    # Callback to show all the data of a clicked point
     @app.callback(
-        Output('point-count', 'children'),
+        Output('point-details', 'children'),
+        Input('indicator-graphic', 'clickData'),
+        prevent_initial_call=True
+    )
+    def show_point_details(click_data):
+        if not click_data or not click_data.get('points'):
+            raise PreventUpdate
+
+        row_id = int(click_data['points'][0]['customdata'][0])
+        data = utils.current_data(_user())
+        if not 0 <= row_id < len(data):
+            raise PreventUpdate
+
+        # Taken as a one-row table, to keep the float32 values in their
+        # shortest form like the table
+        name, ads_type, *columns = utils.column_titles
+        row = _table_records(data.iloc[[row_id]])[0]
+        return [
+            html.B(row[name]), html.Span(f' ({row[ads_type]})'),
+            html.Ul([html.Li(f'{col} : {"-" if pd.isna(row[col]) else row[col]}')
+                     for col in columns])
+        ]
+
+    # Callback to keep track of the zoom window and of the hidden traces
+    @app.callback(
+        Output('view-state', 'data'),
         Input('indicator-graphic', 'relayoutData'),
         Input('indicator-graphic', 'restyleData'),
-        Input('indicator-graphic', 'figure'),
-        Input('Temp-slider', 'value'),
-        Input('Pressure-slider', 'value'),
+        Input('xaxis-column', 'value'),
+        Input('yaxis-column', 'value'),
+        Input('hover-dropdown', 'value'),
+        Input('settled-ranges', 'data'),
+        Input(ThemeSwitchAIO.ids.switch('theme'), 'value'),
+        Input('actualize-btn', 'n_clicks'),
+        Input('pareto-columns', 'value'),
+        State('view-state', 'data')
     )
-    def count_visible_points(relayout_data, restyle_data, figure, t_range, p_range) -> str:
+    def update_view_state(relayout_data, restyle_data, x_col, y_col, hover, settled, theme, n_clicks, pareto_columns, view) -> dict:
+        trigger = ctx.triggered_id
+        if trigger == 'indicator-graphic':
+            view = dict(view or _DEFAULT_VIEW)
+            if ctx.triggered_prop_ids.get('indicator-graphic.restyleData'):
+                t_range, p_range = _settled_ranges(settled)
+                data, rows, *_ = _plot_rows(
+                    t_range, p_range, x_col, y_col, view, _user())
+                types = utils.trace_types(data, rows)
+                view['hidden'] = _apply_restyle(
+                    restyle_data, types, view['hidden'])
+            else:
+                view.update(_apply_relayout(relayout_data, view))
+            return view
+
+        # Any other input rebuilds the figure, which resets zoom and legend
+        return dict(_DEFAULT_VIEW)
+
+    def visible_rows(view, settled, x_col, y_col):
+        '''Current data and positions of its rows visible on the graph'''
+        view = view or _DEFAULT_VIEW
+        t_range, p_range = _settled_ranges(settled)
+        return utils.query_rows(
+            t_range, p_range, x_col, y_col,
+            view['x_range'], view['y_range'], view['hidden'], _user())
+
+    # Callback to connect the table to the filters, and to count the number
+    # of visible points on the graph from the same selection. Only the rows
+    # of the displayed page are sent to the browser
+    @app.callback(
+        Output('adsorbents-table', 'data'),
+        Output('adsorbents-table', 'page_count'),
+        Output('adsorbents-table', 'page_current'),
+        Output('point-count', 'children'),
+        Input('view-state', 'data'),
+        Input('adsorbents-table', 'page_current'),
+        Input('adsorbents-table', 'page_size'),
+        Input('adsorbents-table', 'sort_by'),
+        Input('adsorbents-table', 'filter_query'),
+        State('settled-ranges', 'data'),
+        State('xaxis-column', 'value'),
+        State('yaxis-column', 'value'),
+        background=settings['background_callbacks']
+    )
+    def update_table(view, page_current, page_size, sort_by, filter_query, settled, x_col, y_col):
+        if _superseded(settled):
+            raise PreventUpdate
 
-        visible_traces, x_min, x_max, y_min, y_max = get_traces(
-            relayout_data, restyle_data, figure)
+        # The selection is kept as positions in the shared data, and only
+        # the rows of the displayed page are copied
+        data, rows = visible_rows(view, settled, x_col, y_col)
+        count = f'Number of visible points : {len(rows)}'
 
-        # Count the visible traces on the graph
-        count = 0
-        for i in visible_traces:
-            x_points: list[float] = []
-            y_points: list[float] = []
+        if filter_query:
+            rows = rows[_table_filter_mask(data, rows, filter_query)]
 
-            trace: dict[str, dict | Any] = figure['data'][i]
+        if sort_by:
+            rows = _sorted_rows(data, rows, sort_by)
 
-            x_vals: dict[str, Any] = trace['x'].get('_inputArray', dict())
-            if x_vals:
-                for k, v in x_vals.items():
-                    if k.isdigit():
-                        x_points.append(v)
+        # Go back to the first page whenever the selection changes
+        if ctx.triggered_id != 'adsorbents-table' or \
+                'adsorbents-table.page_current' not in ctx.triggered_prop_ids:
+            page_current = 0
 
-            y_vals: dict[str, Any] = trace['y'].get('_inputArray', dict())
-            if y_vals:
-                for k, v in y_vals.items():
-                    if k.isdigit():
-                        y_points.append(v)
+        page_size = page_size or 10
+        page_count = max(1, -(-len(rows) // page_size))
+        page = data.iloc[
+            rows[page_current * page_size:(page_current + 1) * page_size]]
 
-            for x, y in zip(x_points, y_points):
-                if None not in (x_min, x_min, y_max, y_max, x, y):
-                    if (x_min <= x <= x_max) and (y_min <= y <= y_max):
-                        count += 1
+        return _table_records(page), page_count, page_current, count
 
-        return f'Number of visible points : {count}'
+    # Callback to summarize each adsorbent type visible on the graph. It
+    # only depends on the selection, not on the page of the table
+    @app.callback(
+        Output('type-statistics', 'children'),
+        Input('view-state', 'data'),
+        State('settled-ranges', 'data'),
+        State('xaxis-column', 'value'),
+        State('yaxis-column', 'value'),
+        background=settings['background_callbacks']
+    )
+    def update_statistics(view, settled, x_col, y_col):
+        if not x_col or not y_col or _superseded(settled):
+            raise PreventUpdate
 
+        view = view or _DEFAULT_VIEW
+        t_range, p_range = _settled_ranges(settled)
+        statistics = utils.type_statistics(
+            x_col, y_col, t_range, p_range,
+            view['x_range'], view['y_range'], view['hidden'], _user())
+        return _statistics_table(statistics, x_col, y_col)
 
-    # Callback to connect the table to the filters
     @app.callback(
-        Output('adsorbents-table', 'children'),
-        Input('indicator-graphic', 'relayoutData'),
-        Input('indicator-graphic', 'restyleData'),
-        Input('indicator-graphic', 'figure'),
-        Input('Temp-slider', 'value'),
-        Input('Pressure-slider', 'value'),
+        Output('adsorbents-table', 'style_header'),
+        Output('adsorbents-table', 'style_cell'),
+        Output('adsorbents-table', 'style_data_conditional'),
         Input(ThemeSwitchAIO.ids.switch('theme'), 'value')
     )
-    def update_table(relayout_data, restyle_data, figure, t_range, p_range, theme):
-
-        visible_traces, x_min, x_max, y_min, y_max = get_traces(
-            relayout_data, restyle_data, figure)
-
-        # Extract to data
-        column_names = df.head(1)
-        filtered_data = []
-
-        for i in visible_traces:
-            x_points: list[float] = []
-            y_points: list[float] = []
-
-            trace: dict[str, dict | Any] = figure['data'][i]
-
-            x_vals: dict[str, Any] = trace['x'].get('_inputArray')
-            if x_vals:
-                for k, v in x_vals.items():
-                    if k.isdigit():
-                        x_points.append(v)
-
-            y_vals: dict[str, Any] = trace['y'].get('_inputArray')
-            if y_vals:
-                for k, v in y_vals.items():
-                    if k.isdigit():
-                        y_points.append(v)
-
-            custom_data = trace.get('customdata', [])
-
-            for x, y, custom in zip(x_points, y_points, custom_data):
-                if None not in (x_min, x_max, y_min, y_max, x, y):
-                    if (x_min <= x <= x_max) and (y_min <= y <= y_max):
-                        row = dict(zip(column_names, custom))
-                        filtered_data.append(row)
-
-            dark = not theme
-
-            children = dash_table.DataTable(
-                columns=[{'name': col, 'id': col} for col in df.columns],
-                data=filtered_data,
-                style_table={'overflowX': 'auto'},
-                style_header={
-                    'backgroundColor': '#34495e' if dark else '#e1e5ec',
-                    'color': 'white' if dark else 'black'
-                },
-                style_cell={
-                    'backgroundColor': '#2b2b2b' if dark else 'white',
-                    'color': 'white' if dark else 'black',
-                    'textAlign': 'left',
-                    'padding': '5px',
-                },
-                style_data_conditional=[
-                    {
-                        'if': {'row_index': 'odd'},
-                        'backgroundColor': '#353535' if dark else '#f9f9f9'
-                    }
-                ],
-                page_size=10
-            )
-
-        return children
+    def update_table_style(theme):
+        dark = not theme
+
+        style_header = {
+            'backgroundColor': '#34495e' if dark else '#e1e5ec',
+            'color': 'white' if dark else 'black'
+        }
+        style_cell = {
+            'backgroundColor': '#2b2b2b' if dark else 'white',
+            'color': 'white' if dark else 'black',
+            'textAlign': 'left',
+            'padding': '5px',
+        }
+        style_data_conditional = [
+            {
+                'if': {'row_index': 'odd'},
+                'backgroundColor': '#353535' if dark else '#f9f9f9'
+            }
+        ]
+
+        return style_header, style_cell, style_data_conditional
 
 
     def check_inputs(name, ads_type, BET, Pore, Ads, T, P) -> tuple[bool, html.Span | None]:
@@ -310,11 +726,57 @@ def register_callbacks(app: Dash) -> None:
             insert, span = check_inputs(name, ads_type, BET, Pore, Ads, T, P)
 
             if insert:
-                utils.insert_into_csv(name, ads_type, BET, Pore, Ads, T, P)
+                error = _unidentified_user_error()
+                if error is not None:
+                    return error
+                utils.insert_into_csv(name, ads_type, BET, Pore, Ads, T, P,
+                                      user=_user())
 
             return span
 
     @app.callback(
+        Output('upload-output', 'children'),
+        Input('upload-data', 'contents'),
+        State('upload-data', 'filename'),
+        prevent_initial_call=True
+    )
+    def import_file(contents, filename):
+        if not contents:
+            raise PreventUpdate
+
+        if not filename.lower().endswith('.csv'):
+            return html.Span('Error : Please upload a .csv file',
+                             style={'color': 'red'})
+        error = _unidentified_user_error()
+        if error is not None:
+            return error
+
+        _, content_string = contents.split(',', 1)
+        try:
+            decoded = base64.b64decode(content_string).decode('utf-8')
+            data = pd.read_csv(io.StringIO(decoded))
+            errors = utils.bulk_insert(data, _user())
+        except Exception as e:
+            return html.Span(f'Error : Could not import {filename} ({e})',
+                             style={'color': 'red'})
+
+        imported = html.Div(
+            f'Imported {len(data) - len(errors)} adsorbents from {filename}')
+        if errors.empty:
+            return imported
+
+        # Line numbers in the file, counting the header as line 1
+        rejected = [html.Li(f'Line {i + 2} : {msg}') for i, msg in errors.items()]
+        return [
+            imported,
+            html.Span(f'Rejected {len(errors)} rows :', style={'color': 'red'}),
+            html.Ul(rejected, style={'color': 'red'})
+        ]
+
+    # Callback to empty the form, in assets/ui.js. It waits for the answer
+    # to the submission, which reads the fields
+    app.clientside_callback(
+        ClientsideFunction(namespace='adsorbase', function_name='clear_fields'),
         [
             Output('input-name', 'value'),
             Output('input-type', 'value'),
@@ -324,28 +786,18 @@ def register_callbacks(app: Dash) -> None:
             Output('input-T', 'value'),
             Output('input-P', 'value')
         ],
-        Input('submit-btn', 'n_clicks')
+        Input('output', 'children')
     )
-    def clear_fields(n_clicks):
-        return ['', ''] + [None for i in range(5)]
 
+    # Callback to point the export button to the rows visible on the graph
     @app.callback(
-        Output('download-dataframe-csv', 'data'),
-        Input('export-btn', 'n_clicks'),
-        State('xaxis-column', 'value'),
-        State('yaxis-column', 'value'),
-        State('Temp-slider', 'value'),
-        State('Pressure-slider', 'value'),
-        prevent_initial_call=True
+        Output('export-btn', 'href'),
+        Input('export-format', 'value'),
+        Input('view-state', 'data'),
+        Input('xaxis-column', 'value'),
+        Input('yaxis-column', 'value'),
+        Input('settled-ranges', 'data')
     )
-    def export_filtered_data(n_clicks, x_col, y_col, t_range, p_range):
-        dff = utils.current_data()
-
-        if t_range:
-            dff = dff[(dff['Conditions T [K]'] >= t_range[0]) &
-                      (dff['Conditions T [K]'] <= t_range[1])]
-        if p_range:
-            dff = dff[(dff['Conditions P [bar]'] >= p_range[0]) &
-                      (dff['Conditions P [bar]'] <= p_range[1])]
-
-        return dcc.send_data_frame(dff.to_csv, filename='filtered_data.csv', index=False)
+    def update_export_link(fmt, view, x_col, y_col, settled):
+        t_range, p_range = _settled_ranges(settled)
+        return download_url(fmt, t_range, p_range, x_col, y_col, view)
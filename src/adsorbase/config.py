@@ -0,0 +1,95 @@
+"""Settings of the Adsorbase app, to be changed before launching it."""
+
+settings = {
+    # 'auto' renders the graph with WebGL above `webgl_threshold` points and
+    # with SVG below. 'svg' and 'webgl' force either mode.
+    'render_mode': 'auto',
+    'webgl_threshold': 1000,
+    # Maximum number of points sent to the graph. Above it, a stratified
+    # sample is drawn, and the full resolution is shown once zoomed in enough.
+    'point_budget': 20_000,
+    # Total size of the data of the figures kept in memory to answer
+    # repeated views without rebuilding them. 0 disables the cache.
+    'figure_cache_bytes': 64 * 2**20,
+    # Format of the custom database in ~/.adsorbase/. 'feather' and
+    # 'parquet' are memory-mapped binary formats, faster to load than 'csv'
+    # for large databases, which require pyarrow. 'sqlite' is an indexed
+    # database, which can be queried without loading it whole.
+    'storage': 'csv',
+    # Run the graph and table callbacks as background jobs in separate
+    # processes, so a slow update does not block the other users, and a
+    # job superseded by newer input is cancelled. The figure cache does not
+    # apply to them. Requires diskcache.
+    'background_callbacks': False,
+    # Minimum time between two graph and table updates while a slider is
+    # dragged, in milliseconds. The last position is always applied.
+    'slider_interval_ms': 250,
+    # Load the data and build the page in a background thread as soon as
+    # the app is created, instead of on the first request.
+    'warm_up': True,
+    # Compress the responses with gzip. Requires flask-compress.
+    'compress': False,
+    # Time in seconds for which browsers may cache the files of assets/,
+    # whose URLs change with them. None makes them check for changes.
+    'assets_max_age': None,
+    # Measure every callback, serve the totals on /metrics and log each
+    # call to the 'adsorbase.metrics' logger.
+    'instrument': False,
+    # Directory receiving the profiles of the requests asking for one with
+    # an X-Adsorbase-Profile header or an adsorbase_profile cookie, set to
+    # 'cprofile' or 'pyinstrument'. None disables profiling.
+    'profile_dir': None,
+    # Keep the rows added in the app apart for each user, in
+    # ~/.adsorbase/users/, on top of the shared database, which is loaded
+    # once for all of them. Users are told apart by a cookie, or by the
+    # `user_header` request header if set, e.g. by an authenticating proxy.
+    'multi_user': False,
+    'user_header': None,
+}
+
+_CHOICES = {
+    'render_mode': ('auto', 'svg', 'webgl'),
+    'storage': ('csv', 'feather', 'parquet', 'sqlite'),
+}
+
+
+def configure(**options) -> None:
+    """Update the settings, e.g. `configure(render_mode='webgl')`"""
+    for key, value in options.items():
+        if key not in settings:
+            raise ValueError(f'Unknown setting: {key}')
+        if key in _CHOICES and value not in _CHOICES[key]:
+            raise ValueError(
+                f'Invalid value for {key}: {value!r}, expected one of {_CHOICES[key]}')
+
+    if options.get('storage', 'csv') in ('feather', 'parquet'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                f"The '{options['storage']}' storage requires pyarrow") from None
+
+    if options.get('background_callbacks'):
+        try:
+            import diskcache  # noqa: F401
+            import multiprocess  # noqa: F401
+            import psutil  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                'Background callbacks require diskcache, multiprocess and '
+                'psutil') from None
+
+    if options.get('compress'):
+        try:
+            import flask_compress  # noqa: F401
+        except ImportError:
+            raise ImportError('Compression requires flask-compress') from None
+
+    settings.update(options)
+
+
+def render_mode(n_points: int) -> str:
+    """Plotly Express render mode for a graph of `n_points` points."""
+    if settings['render_mode'] != 'auto':
+        return settings['render_mode']
+    return 'webgl' if n_points > settings['webgl_threshold'] else 'svg'
@@ -0,0 +1,149 @@
+from collections.abc import Iterator
+from urllib.parse import urlencode
+import zlib
+import numpy as np
+import pandas as pd
+from flask import Flask, Response, abort, request
+import adsorbase.utils as utils
+from adsorbase.users import user_id
+
+DOWNLOAD_ROUTE = '/download/filtered_data'
+
+# Number of rows serialized at once while streaming an export
+_CHUNK_ROWS = 50_000
+
+_FORMATS = {
+    'csv': ('text/csv', 'filtered_data.csv'),
+    'csv.gz': ('application/gzip', 'filtered_data.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'filtered_data.parquet'),
+}
+
+
+def download_url(fmt: str, t_range=None, p_range=None,
+                 x_col: str | None = None, y_col: str | None = None,
+                 view: dict | None = None) -> str:
+    """Link to the export of the rows visible on the graph."""
+    params = {'format': fmt}
+    for name, bounds in (('t', t_range), ('p', p_range)):
+        if bounds:
+            params[f'{name}_min'], params[f'{name}_max'] = bounds
+
+    if x_col and y_col:
+        params['x'], params['y'] = x_col, y_col
+        if view:
+            for name in ('x', 'y'):
+                if view[f'{name}_range']:
+                    params[f'{name}_min'], params[f'{name}_max'] = view[f'{name}_range']
+            params['hidden'] = view['hidden']
+
+    return DOWNLOAD_ROUTE + '?' + urlencode(params, doseq=True)
+
+
+def _range_arg(name: str) -> list[float] | None:
+    if f'{name}_min' not in request.args:
+        return None
+    try:
+        return [float(request.args[f'{name}_min']), float(request.args[f'{name}_max'])]
+    except (KeyError, ValueError):
+        abort(400, f'Invalid {name} range')
+
+
+def _csv_chunks(data: pd.DataFrame, rows: np.ndarray) -> Iterator[bytes]:
+    yield (','.join(utils.column_titles) + '\n').encode('utf-8')
+    for start in range(0, len(rows), _CHUNK_ROWS):
+        chunk = data.iloc[rows[start:start + _CHUNK_ROWS]]
+        yield chunk.to_csv(header=False, index=False,
+                           columns=utils.column_titles,
+                           lineterminator='\n').encode('utf-8')
+
+
+def _gzip_chunks(data: pd.DataFrame, rows: np.ndarray) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in _csv_chunks(data, rows):
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object whose content is drained after each write."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        content = b''.join(self.chunks)
+        self.chunks.clear()
+        return content
+
+
+def _parquet_chunks(data: pd.DataFrame, rows: np.ndarray) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    schema = pa.Schema.from_pandas(
+        data[utils.column_titles].iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(rows), _CHUNK_ROWS):
+            chunk = data[utils.column_titles].iloc[rows[start:start + _CHUNK_ROWS]]
+            writer.write_table(pa.Table.from_pandas(
+                chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+_WRITERS = {
+    'csv': _csv_chunks,
+    'csv.gz': _gzip_chunks,
+    'parquet': _parquet_chunks,
+}
+
+
+def download_filtered_data() -> Response:
+    """Stream the rows selected by the query string, in chunks, as CSV,
+    gzip-compressed CSV or Parquet."""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in _FORMATS:
+        abort(400, f'Unknown format: {fmt}')
+    if fmt == 'parquet':
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            abort(501, 'Parquet export requires pyarrow')
+
+    x_col = request.args.get('x')
+    y_col = request.args.get('y')
+    if (x_col or y_col) and not {x_col, y_col} <= set(utils.axis_options):
+        abort(400, 'Invalid axis column')
+
+    # The data and the selected rows are taken once, so the export is
+    # consistent even if rows are added while it is being sent
+    data, rows = utils.query_rows(
+        _range_arg('t'), _range_arg('p'), x_col, y_col,
+        _range_arg('x'), _range_arg('y'), request.args.getlist('hidden'),
+        user_id(request.cookies, request.headers))
+
+    mimetype, filename = _FORMATS[fmt]
+    return Response(
+        _WRITERS[fmt](data, rows),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def register_routes(server: Flask) -> None:
+    server.add_url_rule(DOWNLOAD_ROUTE, 'download_filtered_data',
+                        download_filtered_data)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+
+def column_values(column: pd.Series) -> np.ndarray:
+    """Values of a numeric column as a float array, in the precision of the
+    column, with NaN for the missing values."""
+    dtype = column.dtype if column.dtype.kind == 'f' else np.float64
+    return column.to_numpy(dtype=dtype, na_value=np.nan)
+
+
+def _position_dtype(n_rows: int) -> type:
+    """Smallest integer type for the positions of `n_rows` rows"""
+    return np.int32 if n_rows < 2**31 else np.int64
+
+
+class SortedColumnIndex:
+    """Sorted-order permutations of numeric columns, answering range queries
+    in O(log N + k) instead of scanning whole columns.
+
+    The index is immutable: `extended` returns a new index, so it can be
+    shared between threads while rows are being appended. Values are kept
+    in the precision of their column, and positions as 32-bit integers
+    whenever possible, which makes the index about half the size of float64
+    values with 64-bit positions."""
+
+    def __init__(self, data: pd.DataFrame, columns: list[str]) -> None:
+        self.columns = list(columns)
+        self.n_rows = len(data)
+        self._values: dict[str, np.ndarray] = {}
+        self._sorted: dict[str, np.ndarray] = {}
+        self._order: dict[str, np.ndarray] = {}
+
+        for col in self.columns:
+            values = column_values(data[col])
+            order = np.argsort(values, kind='stable').astype(
+                _position_dtype(self.n_rows))
+            self._values[col] = values
+            self._order[col] = order
+            self._sorted[col] = values[order]
+
+    def extended(self, new_rows: pd.DataFrame) -> 'SortedColumnIndex':
+        """Index of the data with `new_rows` appended, merging the new values
+        into the existing sorted arrays rather than sorting everything again."""
+        index = object.__new__(SortedColumnIndex)
+        index.columns = self.columns
+        index.n_rows = self.n_rows + len(new_rows)
+        index._values, index._sorted, index._order = {}, {}, {}
+
+        position_dtype = _position_dtype(index.n_rows)
+        new_ids = np.arange(self.n_rows, index.n_rows, dtype=position_dtype)
+        for col in self.columns:
+            dtype = self._values[col].dtype
+            new_values = new_rows[col].to_numpy(dtype=dtype, na_value=np.nan)
+            new_order = np.argsort(new_values, kind='stable')
+            new_sorted = new_values[new_order]
+
+            positions = np.searchsorted(self._sorted[col], new_sorted, side='right')
+            index._values[col] = np.concatenate([self._values[col], new_values])
+            index._sorted[col] = np.insert(self._sorted[col], positions, new_sorted)
+            index._order[col] = np.insert(
+                self._order[col].astype(position_dtype, copy=False),
+                positions, new_ids[new_order])
+
+        return index
+
+    def _bounds(self, col: str, low: float, high: float) -> tuple[int, int]:
+        # The bounds are rounded like the values, so that a value matches
+        # the bound it was read from
+        values = self._sorted[col]
+        low, high = values.dtype.type(low), values.dtype.type(high)
+        return (np.searchsorted(values, low, side='left'),
+                np.searchsorted(values, high, side='right'))
+
+    def query(self, ranges: dict[str, tuple[float, float]]) -> np.ndarray:
+        """Sorted positions of the rows within all the `ranges`, given as
+        {column: (low, high)}.
+
+        The candidates are taken from the most selective column, and only
+        those are checked against the other ranges."""
+        if not ranges:
+            return np.arange(self.n_rows)
+
+        bounds = {col: self._bounds(col, *limits)
+                  for col, limits in ranges.items()}
+        first = min(bounds, key=lambda col: bounds[col][1] - bounds[col][0])
+        start, stop = bounds[first]
+        rows = self._order[first][start:stop]
+
+        for col, (low, high) in ranges.items():
+            if col == first:
+                continue
+            values = self._values[col][rows]
+            low, high = values.dtype.type(low), values.dtype.type(high)
+            rows = rows[(low <= values) & (values <= high)]
+
+        return np.sort(rows)
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+def _concat(parts: list) -> pd.Series | pd.DataFrame:
+    """Concatenate Series or DataFrames, keeping the categorical columns
+    categorical even if their categories differ."""
+    first = parts[0]
+    if isinstance(first, pd.DataFrame):
+        return pd.DataFrame({col: _concat([part[col] for part in parts])
+                             for col in first.columns})
+    if isinstance(first.dtype, pd.CategoricalDtype):
+        values = union_categoricals([part.array for part in parts],
+                                    sort_categories=True)
+        return pd.Series(values, name=first.name)
+    return pd.concat(parts, ignore_index=True)
+
+
+class _Positions:
+    """`iloc` indexer of a `LayeredData`"""
+
+    def __init__(self, layers: 'LayeredData') -> None:
+        self._layers = layers
+
+    def __getitem__(self, key):
+        return self._layers._take(key)
+
+
+class LayeredData:
+    """Rows of a shared `base` DataFrame followed by the rows of a small
+    `overlay`, read as if they were concatenated, without copying the base.
+
+    Only the part of the DataFrame interface used on selections is
+    available: `len`, `columns`, selecting columns, `iloc` with positions,
+    and `min` and `max` of a column. Rows are copied once taken with `iloc`,
+    and labelled with their positions, like those of a DataFrame with a
+    RangeIndex."""
+
+    def __init__(self, base: pd.DataFrame | pd.Series,
+                 overlay: pd.DataFrame | pd.Series) -> None:
+        self.base = base
+        self.overlay = overlay
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.overlay)
+
+    @property
+    def columns(self) -> pd.Index:
+        return self.base.columns
+
+    def __getitem__(self, key) -> 'LayeredData':
+        return LayeredData(self.base[key], self.overlay[key])
+
+    @property
+    def iloc(self) -> _Positions:
+        return _Positions(self)
+
+    def _take(self, key):
+        n_base = len(self.base)
+        if isinstance(key, (int, np.integer)):
+            position = int(key) + (len(self) if key < 0 else 0)
+            if position < n_base:
+                return self.base.iloc[position]
+            return self.overlay.iloc[position - n_base].rename(position)
+
+        if isinstance(key, slice):
+            rows = np.arange(*key.indices(len(self)))
+        else:
+            rows = np.asarray(key)
+        in_base = rows < n_base
+        if in_base.all():
+            return self.base.iloc[rows]
+        if not in_base.any():
+            return self.overlay.iloc[rows - n_base].set_axis(rows)
+
+        # Taken from each layer, then put back in the order of `rows`
+        order = np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)])
+        taken = _concat([self.base.iloc[rows[in_base]],
+                         self.overlay.iloc[rows[~in_base] - n_base]])
+        return taken.iloc[np.argsort(order, kind='stable')].set_axis(rows)
+
+    def min(self):
+        return pd.Series([self.base.min(), self.overlay.min()]).min()
+
+    def max(self):
+        return pd.Series([self.base.max(), self.overlay.max()]).max()
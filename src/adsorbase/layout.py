@@ -1,12 +1,10 @@
-from dash import html, dcc
-from math import floor, ceil
-from .utils import load_df, current_data, axis_options
+from dash import html, dcc, dash_table
+from .utils import axis_options, column_titles
+from .config import settings
+from .export import DOWNLOAD_ROUTE
 import dash_bootstrap_components as dbc
 from dash_bootstrap_templates import ThemeSwitchAIO
 
-df = load_df()
-filtered_df = current_data()
-
 color_mode_switch = html.Span([
     dbc.Label(className='fa fa-moon', html_for='color-mode-switch'),
     dbc.Switch(
@@ -87,12 +85,11 @@ y_dropdown = html.Div([
 )
 
 temp_slider_text = html.Label(
-    'Select the right temperature conditions [K]',
+    ['Select the right temperature conditions [K]', html.Span(id='Temp-range')],
     style={'marginLeft': '20px'}
 )
+# The bounds of the sliders are set from the data once the page is loaded
 temp_slider = dcc.RangeSlider(
-    min = floor(filtered_df['Conditions T [K]'].min()/10)*10,
-    max = ceil(filtered_df['Conditions T [K]'].max()/10)*10,
     step=None,
     updatemode='drag',
     tooltip={'placement': 'bottom', 'always_visible': True},
@@ -101,13 +98,11 @@ temp_slider = dcc.RangeSlider(
 )
 
 pressure_slider_text = html.Label(
-    'Select the right pressure conditions [bar]',
+    ['Select the right pressure conditions [bar]', html.Span(id='Pressure-range')],
     style={'marginLeft': '20px', 'marginTop': '5px'}
 )
 
 pressure_slider = dcc.RangeSlider(
-    min = floor(df['Conditions P [bar]'].min()/10)*10,
-    max = ceil(df['Conditions P [bar]'].max()/10)*10,
     step=None,
     updatemode='drag',
     tooltip={'placement': 'bottom', 'always_visible': True},
@@ -115,6 +110,15 @@ pressure_slider = dcc.RangeSlider(
     id='Pressure-slider'
 )
 
+# Slider positions the graph and the table are updated for, which only
+# follow the sliders every `slider_interval_ms` while they are dragged
+settled_ranges = dcc.Store(id='settled-ranges')
+slider_interval = dcc.Store(id='slider-interval',
+                            data=settings['slider_interval_ms'])
+
+# Columns the hover dropdown offers, apart from the axes
+hover_columns = dcc.Store(id='hover-columns', data=column_titles[2:])
+
 hover_dropdown = html.Div([
     html.Label('Select hover data:'),
     dcc.Dropdown(
@@ -137,8 +141,32 @@ hover_dropdown = html.Div([
     'marginLeft': '20px'
 })
 
+# Columns of the Pareto front circled on the graph, none to hide it
+pareto_dropdown = html.Div([
+    html.Label('Highlight the Pareto front of:'),
+    dcc.Dropdown(
+        id='pareto-columns',
+        options=[{'label': col, 'value': col} for col in axis_options],
+        value=[],
+        multi=True,
+        style={
+            'width': '100%',
+            'color': 'black',
+            'justify-content': 'center',
+            'marginLeft': '5px'
+        }
+    )
+], style={
+    'width': '30%',
+    'display': 'inline-block',
+    'marginBottom': '20px',
+    'marginTop': '20px',
+    'marginLeft': '20px'
+})
+
 graph = dcc.Graph(id='indicator-graphic',
                   style={'height': '90vh'})
+view_state = dcc.Store(id='view-state')
 shown_count = html.Div(
     id='point-count',
     style={'marginBottom': '20px',
@@ -147,6 +175,20 @@ shown_count = html.Div(
            'fontWeight': 'bold'}
 )
 
+# Statistics of each adsorbent type on the graph, next to the point count
+type_statistics = html.Div(
+    id='type-statistics',
+    style={'marginLeft': '20px',
+           'marginRight': '20px'}
+)
+
+point_details = html.Div(
+    'Click on a point to see all its data',
+    id='point-details',
+    style={'marginBottom': '20px',
+           'marginLeft': '20px'}
+)
+
 input_title = html.H3('Extending the database',
                       style={'marginLeft': '20px'})
 input_prompt = html.P('Note: use periods as decimal separators, not commas',
@@ -185,27 +227,78 @@ actualize_button = dbc.Button(
 add_output = html.Div(id='output', style={
                       'color': 'green', 'marginLeft': '20px'})
 
+upload = dcc.Upload(
+    id='upload-data',
+    children=html.Div([
+        'Import many adsorbents at once: drag and drop or ',
+        html.A('select a CSV file', style={'textDecoration': 'underline',
+                                           'cursor': 'pointer'})
+    ]),
+    accept='.csv',
+    style={
+        'borderWidth': '1px',
+        'borderStyle': 'dashed',
+        'borderRadius': '5px',
+        'textAlign': 'center',
+        'padding': '15px',
+        'marginTop': '20px',
+        'marginLeft': '20px',
+        'marginRight': '20px'
+    }
+)
+
+upload_output = html.Div(id='upload-output', style={
+                         'color': 'green', 'marginLeft': '20px'})
+
 filtered_table_title = html.H3(
     'Filtered Adsorbents Table',
     style={'textAlign': 'center'}
 )
 
 filtered_table = dcc.Loading(
-    id='adsorbents-table',
     type='default',
-    children=[]
+    children=dash_table.DataTable(
+        id='adsorbents-table',
+        columns=[{'name': col, 'id': col, 'type': 'text' if i < 2 else 'numeric'}
+                 for i, col in enumerate(column_titles)],
+        style_table={'overflowX': 'auto'},
+        page_current=0,
+        page_size=10,
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='multi',
+        sort_by=[],
+        filter_action='custom',
+        filter_query=''
+    )
 )
 
 export_button = dbc.Button(
     'Export Data',
     id='export-btn',
     n_clicks=0,
+    href=DOWNLOAD_ROUTE,
+    external_link=True,
     style={'marginTop': '20px',
            'marginBottom': '20px',
            'marginLeft': '20px'}
 )
 
-download = dcc.Download(id='download-dataframe-csv')
+export_format = dcc.Dropdown(
+    id='export-format',
+    options=[
+        {'label': 'CSV', 'value': 'csv'},
+        {'label': 'CSV (gzip)', 'value': 'csv.gz'},
+        {'label': 'Parquet', 'value': 'parquet'}
+    ],
+    value='csv',
+    clearable=False,
+    style={'width': '150px',
+           'color': 'black',
+           'display': 'inline-block',
+           'verticalAlign': 'middle',
+           'marginLeft': '10px'}
+)
 
 
 full_layout = html.Div([
@@ -222,12 +315,19 @@ full_layout = html.Div([
         temp_slider_text,
         temp_slider,
         pressure_slider_text,
-        pressure_slider
+        pressure_slider,
+        settled_ranges,
+        slider_interval
     ]),
 
     hover_dropdown,
+    pareto_dropdown,
+    hover_columns,
     graph,
+    view_state,
     shown_count,
+    type_statistics,
+    point_details,
     input_title,
     input_prompt,
     *input_fields,
@@ -235,11 +335,13 @@ full_layout = html.Div([
     add_button,
     actualize_button,
     add_output,
+    upload,
+    upload_output,
 
     html.Hr(),
 
     filtered_table_title,
     filtered_table,
     export_button,
-    download
+    export_format
 ], id='main-div')
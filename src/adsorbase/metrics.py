@@ -0,0 +1,205 @@
+"""Opt-in instrumentation of the callbacks and requests of the app.
+
+With the `instrument` setting, every server-side callback is timed, along
+with the time spent loading the data, the number of rows it selected and
+the size of its response. The totals per callback are served in the
+Prometheus text format by `METRICS_ROUTE`, and each call is logged as a JSON
+line by the `adsorbase.metrics` logger.
+
+With the `profile_dir` setting, requests with an `X-Adsorbase-Profile`
+header or an `adsorbase_profile` cookie (set to 'cprofile' or
+'pyinstrument') are profiled, and the profile is written to that directory.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
+import cProfile
+import json
+import logging
+import threading
+import time
+
+# Dash and Flask are imported when needed, as adsorbase.utils imports this
+# module for its measures, and does not depend on them otherwise
+if TYPE_CHECKING:
+    from dash import Dash
+    from flask import Flask, Response
+
+METRICS_ROUTE = '/metrics'
+
+logger = logging.getLogger('adsorbase.metrics')
+
+_FIELDS = ('calls', 'errors', 'seconds', 'load_seconds', 'rows', 'response_bytes')
+
+_HELP = {
+    'calls': ('counter', 'Number of calls of the callback'),
+    'errors': ('counter', 'Number of calls which raised an error'),
+    'seconds': ('counter', 'Total wall time of the callback'),
+    'load_seconds': ('counter', 'Time spent loading and indexing the data'),
+    'rows': ('counter', 'Number of rows selected by the queries'),
+    'response_bytes': ('counter', 'Size of the serialized responses'),
+}
+
+# Measures of the callback running in the current thread, if instrumented
+_active = threading.local()
+
+
+@contextmanager
+def loading():
+    """Count the time spent in the block as loading time of the running
+    callback."""
+    stats = getattr(_active, 'stats', None)
+    if stats is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        stats['load_seconds'] += perf_counter() - start
+
+
+def count_rows(n_rows: int) -> None:
+    """Add rows selected by a query to the running callback."""
+    stats = getattr(_active, 'stats', None)
+    if stats is not None:
+        stats['rows'] += n_rows
+
+
+class CallbackMetrics:
+    """Totals of the measures of each callback, since the start of the
+    process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: dict[str, dict[str, float]] = defaultdict(
+            lambda: dict.fromkeys(_FIELDS, 0))
+
+    def record(self, callback: str, stats: dict[str, float]) -> None:
+        with self._lock:
+            totals = self._totals[callback]
+            for field in _FIELDS:
+                totals[field] += stats[field]
+
+    def prometheus(self) -> str:
+        """Totals in the Prometheus text exposition format"""
+        with self._lock:
+            totals = {name: dict(values) for name, values in self._totals.items()}
+
+        lines = []
+        for field in _FIELDS:
+            metric = f'adsorbase_callback_{field}_total'
+            kind, description = _HELP[field]
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {kind}')
+            for name, values in sorted(totals.items()):
+                lines.append(f'{metric}{{callback="{name}"}} {values[field]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+callback_metrics = CallbackMetrics()
+
+
+def _instrumented(name: str, callback):
+    from dash.exceptions import PreventUpdate
+
+    @wraps(callback)
+    def wrapper(*args, **kwargs):
+        stats = dict.fromkeys(_FIELDS, 0)
+        stats['calls'] = 1
+        _active.stats = stats
+        status = 'ok'
+        start = perf_counter()
+        try:
+            response = callback(*args, **kwargs)
+        except PreventUpdate:
+            status = 'prevented'
+            raise
+        except Exception:
+            status = 'error'
+            stats['errors'] = 1
+            raise
+        else:
+            # Dash responses are ASCII JSON, whose length is their size
+            if isinstance(response, (str, bytes)):
+                stats['response_bytes'] = len(response)
+            return response
+        finally:
+            stats['seconds'] = perf_counter() - start
+            _active.stats = None
+            callback_metrics.record(name, stats)
+            logger.info(json.dumps({'callback': name, 'status': status, **stats}))
+
+    return wrapper
+
+
+def instrument(app: Dash) -> None:
+    """Measure every server-side callback registered so far on `app`, and
+    serve the totals on `METRICS_ROUTE`."""
+    from flask import Response
+
+    for entry in app.callback_map.values():
+        if 'callback' not in entry:  # clientside
+            continue
+        callback = entry['callback']
+        name = getattr(callback, '__wrapped__', callback).__name__
+        entry['callback'] = _instrumented(name, callback)
+
+    app.server.add_url_rule(
+        METRICS_ROUTE, 'metrics',
+        lambda: Response(callback_metrics.prometheus(),
+                         mimetype='text/plain; version=0.0.4'))
+
+
+def _start_profile() -> None:
+    from flask import g, request
+
+    kind = request.headers.get('X-Adsorbase-Profile') or \
+        request.cookies.get('adsorbase_profile')
+    if kind == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            return
+        g.profiler = Profiler()
+        g.profiler.start()
+    elif kind == 'cprofile':
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _write_profile(directory: Path, response: Response) -> Response:
+    from flask import g, request
+
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+
+    route = request.path.strip('/').replace('/', '_') or 'index'
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{route}-{id(profiler):x}'
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        path = directory / f'{name}.prof'
+        profiler.dump_stats(path)
+    else:
+        profiler.stop()
+        path = directory / f'{name}.html'
+        path.write_text(profiler.output_html(), encoding='utf-8')
+
+    response.headers['X-Adsorbase-Profile-File'] = path.name
+    return response
+
+
+def register_profiler(server: Flask, directory: str | Path) -> None:
+    """Profile the requests asking for it, into `directory`."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    server.before_request(_start_profile)
+    server.after_request(lambda response: _write_profile(directory, response))
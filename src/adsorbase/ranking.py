@@ -0,0 +1,142 @@
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+# Number of points found on the front before sweeping the others, each of
+# which discards at once the points it dominates
+_CHAMPIONS = 8
+
+# Number of points looked up at once in the staircase of the 3D sweep
+_BLOCK = 1024
+
+
+def _unique_rows(values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lexicographic descending order of the rows of `values`, the positions
+    in that order of the first of each group of equal rows, and the group of
+    each row in that order."""
+    order = np.lexsort(-values.T[::-1])
+    ordered = values[order]
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    return order, np.flatnonzero(new), np.cumsum(new) - 1
+
+
+def _sweep_2d(values: np.ndarray) -> np.ndarray:
+    """Front of distinct points sorted in descending lexicographic order:
+    a point is dominated if a previous one has a greater or equal second
+    value."""
+    best = np.maximum.accumulate(values[:, 1])
+    front = np.ones(len(values), dtype=bool)
+    front[1:] = values[1:, 1] > best[:-1]
+    return front
+
+
+def _sweep_3d(values: np.ndarray) -> np.ndarray:
+    """Front of distinct points sorted in descending lexicographic order.
+
+    Every previous point is at least as good on the first value, so a point
+    is dominated if one of them is at least as good on the two others. The
+    front of the previous points on these two values is kept as a staircase,
+    increasing in the second and decreasing in the third, where each point
+    is looked up by bisection. The points are first looked up by blocks in
+    the staircase of the previous blocks, with numpy, and only those left
+    are swept one by one.
+
+    A lookup takes O(log F), F being the size of the front, but a point
+    joining the front is spliced into the staircase lists in O(F), hence
+    O(N log F + F²) overall."""
+    front = np.zeros(len(values), dtype=bool)
+    ys: list[float] = []
+    neg_zs: list[float] = []
+    for block in range(0, len(values), _BLOCK):
+        points = values[block:block + _BLOCK, 1:]
+        candidates = np.arange(len(points))
+        if ys:
+            j = np.searchsorted(np.array(ys), points[:, 0])
+            best = -np.array(neg_zs)[np.minimum(j, len(ys) - 1)]
+            candidates = np.flatnonzero((j == len(ys)) | (best < points[:, 1]))
+
+        for i, (y, z) in zip(candidates.tolist(), points[candidates].tolist()):
+            # Best third value among the points at least as good on the second
+            j = bisect_left(ys, y)
+            if j < len(ys) and -neg_zs[j] >= z:
+                continue
+            front[block + i] = True
+
+            # Points of the staircase the new one dominates
+            end = bisect_right(ys, y)
+            start = bisect_left(neg_zs, -z, 0, end)
+            ys[start:end] = [y]
+            neg_zs[start:end] = [-z]
+    return front
+
+
+def _discard_dominated(values: np.ndarray) -> np.ndarray:
+    """Positions of the points of `values` left once those dominated by a few
+    points of the front are discarded.
+
+    The remaining point with the greatest sum of normalized values is on
+    the front, as no remaining point is better, and a discarded one could
+    only dominate it if the points discarding it did."""
+    # Column by column, as comparisons along the rows are much slower
+    columns = [np.ascontiguousarray(values[:, k]) for k in range(values.shape[1])]
+    sums = sum((col - col.min()) / ((col.max() - col.min()) or 1) for col in columns)
+
+    kept = np.arange(len(values))
+    for _ in range(_CHAMPIONS):
+        if len(kept) <= 1:
+            break
+        i = np.argmax(sums)
+        worse = np.logical_and.reduce([col <= col[i] for col in columns])
+        worse &= ~np.logical_and.reduce([col == col[i] for col in columns])
+        if not worse.any():
+            break
+        better = ~worse
+        kept, sums = kept[better], sums[better]
+        columns = [col[better] for col in columns]
+    return kept
+
+
+def pareto_front(values: np.ndarray) -> np.ndarray:
+    """Mask of the points of `values`, one per row, which no other point
+    dominates, i.e. is at least as good on every column and better on one.
+    Greater values are better, and the values must not be NaN.
+
+    Equal points are on the front together. The points are sorted once in
+    O(N log N), then swept in O(N) with one or two columns. On three
+    columns, most of the dominated points are first discarded with
+    vectorized comparisons, and the sweep takes O(N log F + F²), F being
+    the size of the front."""
+    values = np.asarray(values)
+    if values.ndim != 2 or not 1 <= values.shape[1] <= 3:
+        raise ValueError('pareto_front needs one to three columns of values')
+    mask = np.zeros(len(values), dtype=bool)
+    if not len(values):
+        return mask
+    if values.shape[1] == 1:
+        return values[:, 0] == values[:, 0].max()
+
+    if values.shape[1] == 2:
+        kept, sweep = np.arange(len(values)), _sweep_2d
+    else:
+        kept, sweep = _discard_dominated(values), _sweep_3d
+    order, firsts, groups = _unique_rows(values[kept])
+    mask[kept[order]] = sweep(values[kept[order[firsts]]])[groups]
+    return mask
+
+
+def weighted_scores(values: np.ndarray, weights) -> np.ndarray:
+    """Weighted sum of the columns of `values`, each scaled between 0 and 1
+    over the points. A negative weight favors the lower values of its
+    column. Points with a missing value get a NaN score."""
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(values) == 0:
+        return np.zeros(0)
+
+    # Unlike nanmin and nanmax, no warning for columns without any value
+    low, high = np.fmin.reduce(values, axis=0), np.fmax.reduce(values, axis=0)
+    span = np.where(high > low, high - low, 1)
+    scaled = (values - low) / span
+    # A negative weight scores the lowest value of its column highest
+    scaled = np.where(weights < 0, scaled - 1, scaled)
+    return scaled @ weights
@@ -1,7 +1,111 @@
-from adsorbase.app import app
+import argparse
+import ast
+import gc
+import os
 
-def launch():
+
+def launch(**settings):
+    """Run the app, after updating the settings of `adsorbase.config`"""
+    # Imported here so that importing the package stays cheap
+    from adsorbase.app import create_app
+
+    app = create_app(settings)
     app.run(debug=True)
 
+
+def serve(host: str = '127.0.0.1', port: int = 8050, workers: int | None = None,
+          threads: int = 1, preload: bool = False, **settings) -> None:
+    """Serve the app with gunicorn, in `workers` processes (one per CPU by
+    default) running `threads` threads each, after updating the settings of
+    `adsorbase.config`. The responses are compressed, and the assets cached
+    by browsers.
+
+    With `preload`, the data is loaded once before starting the workers,
+    which share it rather than each loading a copy."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise ImportError(
+            'Serving the app requires gunicorn: pip install adsorbase[serve]') from None
+    from adsorbase.app import create_app, warm_up
+
+    settings = {'compress': True, 'assets_max_age': 365 * 24 * 3600,
+                **settings}
+    if preload:
+        settings['warm_up'] = False
+
+    class Application(BaseApplication):
+
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers or os.cpu_count() or 1)
+            self.cfg.set('threads', threads)
+            self.cfg.set('preload_app', preload)
+
+        def load(self):
+            app = create_app(settings)
+            if preload:
+                warm_up(app)
+                # Keep the loaded objects out of the garbage collector, whose
+                # passes would copy their memory pages into every worker
+                gc.freeze()
+            return app.server
+
+    Application().run()
+
+
+def compact(**settings) -> None:
+    """Compact the custom database and the rows of each user, after
+    updating the settings of `adsorbase.config`"""
+    from adsorbase.config import configure
+    from adsorbase.utils import compact_custom_csv
+
+    configure(**settings)
+    compact_custom_csv()
+
+
+def _setting(option: str) -> tuple[str, object]:
+    key, _, value = option.partition('=')
+    try:
+        return key, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return key, value
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the `adsorbase` command"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-s', '--setting', action='append', type=_setting,
+                        default=[], metavar='KEY=VALUE',
+                        help='setting of adsorbase.config, e.g. storage=sqlite')
+
+    parser = argparse.ArgumentParser(prog='adsorbase')
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('run', parents=[common],
+                        help='run the development server (default)')
+    serve_parser = commands.add_parser(
+        'serve', parents=[common],
+        help='serve the app with gunicorn, for production')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8050)
+    serve_parser.add_argument('-w', '--workers', type=int,
+                              help='number of processes (default: one per CPU)')
+    serve_parser.add_argument('-t', '--threads', type=int, default=1,
+                              help='number of threads per process')
+    serve_parser.add_argument('--preload', action='store_true',
+                              help='load the data once, shared by the workers')
+    commands.add_parser('compact', parents=[common],
+                        help='compact the custom database and the rows of each user')
+
+    args = parser.parse_args(argv)
+    settings = dict(getattr(args, 'setting', []))
+    if args.command == 'serve':
+        serve(args.host, args.port, args.workers, args.threads, args.preload,
+              **settings)
+    elif args.command == 'compact':
+        compact(**settings)
+    else:
+        launch(**settings)
+
 if __name__ == '__main__':
-    launch()
+    main()
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from .index import column_values
+
+# Sums of the points of each type, which add up when rows are appended,
+# and from which the counts, means and correlations follow
+_SUMS = ['n', 'x', 'y', 'xx', 'yy', 'xy']
+_EXTREMES = ['min_x', 'max_x', 'min_y', 'max_y']
+_MEDIANS = ['median_x', 'median_y']
+
+
+def summarize(types: pd.Series, x, y) -> pd.DataFrame:
+    """Sums, extremes and medians of the points (`x`, `y`) of each type,
+    given by `types`, indexed by type. The points must have both values."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keys = types.array if isinstance(types.dtype, pd.CategoricalDtype) else types.to_numpy()
+
+    points = pd.DataFrame({'x': x, 'y': y, 'xx': x * x, 'yy': y * y, 'xy': x * y})
+    grouped = points.groupby(keys, observed=True, sort=False)
+    summary = grouped.sum()
+    summary.insert(0, 'n', grouped.size().astype(np.float64))
+    for name, values in (('x', grouped['x']), ('y', grouped['y'])):
+        summary[f'min_{name}'] = values.min()
+        summary[f'max_{name}'] = values.max()
+        summary[f'median_{name}'] = values.median()
+
+    summary.index = pd.Index(list(summary.index), dtype=object)
+    return summary[_SUMS + _EXTREMES + _MEDIANS]
+
+
+def _merge(summary: pd.DataFrame, added: pd.DataFrame) -> pd.DataFrame:
+    """Summary of the points of both summaries, without the medians of the
+    types of `added`, which cannot be merged."""
+    types = added.index
+    index = summary.index.union(types, sort=False)
+    summary, added = summary.reindex(index), added.reindex(index)
+
+    merged = summary[_SUMS].fillna(0) + added[_SUMS].fillna(0)
+    for name in ('x', 'y'):
+        merged[f'min_{name}'] = np.fmin(summary[f'min_{name}'], added[f'min_{name}'])
+        merged[f'max_{name}'] = np.fmax(summary[f'max_{name}'], added[f'max_{name}'])
+    merged[_MEDIANS] = summary[_MEDIANS]
+    merged.loc[types, _MEDIANS] = np.nan
+    return merged
+
+
+def statistics(summary: pd.DataFrame) -> pd.DataFrame:
+    """Number of points of each type, minimum, maximum, mean and median of
+    both columns, and Pearson correlation coefficient `r` between them."""
+    n = summary['n']
+    mean_x, mean_y = summary['x'] / n, summary['y'] / n
+    var_x = (summary['xx'] / n - mean_x ** 2).clip(lower=0)
+    var_y = (summary['yy'] / n - mean_y ** 2).clip(lower=0)
+    covariance = summary['xy'] / n - mean_x * mean_y
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (covariance / np.sqrt(var_x * var_y)).clip(-1, 1)
+
+    return pd.DataFrame({
+        'count': n.astype(np.int64),
+        'x_min': summary['min_x'], 'x_max': summary['max_x'],
+        'x_mean': mean_x, 'x_median': summary['median_x'],
+        'y_min': summary['min_y'], 'y_max': summary['max_y'],
+        'y_mean': mean_y, 'y_median': summary['median_y'],
+        'r': r.where(np.isfinite(r)),
+    }, index=summary.index)
+
+
+class GroupAggregates:
+    """Summaries of each type of the rows of `data` having both values, for
+    the pairs of columns asked so far.
+
+    A pair is summarized once, on first use. When rows are appended, its
+    sums and extremes are updated from these rows only, while the medians
+    of the types which received rows are computed again on the next use.
+    Like `SortedColumnIndex`, the aggregates are not modified once shared:
+    `extended` returns new ones."""
+
+    def __init__(self, data: pd.DataFrame, type_column: str) -> None:
+        self.data = data
+        self.type_column = type_column
+        # Summary of each pair, and types whose medians are out of date
+        self._pairs: dict[tuple[str, str], tuple[pd.DataFrame, frozenset]] = {}
+
+    def _summarize(self, data: pd.DataFrame, x_col: str, y_col: str,
+                   types=None) -> pd.DataFrame:
+        x, y = column_values(data[x_col]), column_values(data[y_col])
+        mask = ~np.isnan(x) & ~np.isnan(y)
+        if types is not None:
+            mask &= data[self.type_column].isin(list(types)).to_numpy()
+        rows = np.flatnonzero(mask)
+        return summarize(data[self.type_column].iloc[rows], x[rows], y[rows])
+
+    def summary(self, x_col: str, y_col: str) -> pd.DataFrame:
+        """Summary of each type for the columns `x_col` and `y_col`"""
+        cached = self._pairs.get((x_col, y_col))
+        if cached is None:
+            summary = self._summarize(self.data, x_col, y_col)
+        elif cached[1]:
+            summary = cached[0].copy()
+            medians = self._summarize(self.data, x_col, y_col, cached[1])
+            summary.loc[medians.index, _MEDIANS] = medians[_MEDIANS]
+        else:
+            return cached[0]
+
+        self._pairs[(x_col, y_col)] = (summary, frozenset())
+        return summary
+
+    def extended(self, data: pd.DataFrame, new_rows: pd.DataFrame) -> 'GroupAggregates':
+        """Aggregates of `data`, made of the current data followed by
+        `new_rows`."""
+        aggregates = GroupAggregates(data, self.type_column)
+        for (x_col, y_col), (summary, stale) in self._pairs.items():
+            added = self._summarize(new_rows, x_col, y_col)
+            aggregates._pairs[(x_col, y_col)] = (
+                _merge(summary, added), stale | frozenset(added.index))
+        return aggregates
@@ -0,0 +1,49 @@
+"""Users of a shared deployment, with the `multi_user` setting.
+
+Each browser is given a random id in the `USER_COOKIE` cookie on its first
+request. Behind a proxy which authenticates the users, the `user_header`
+setting names the request header holding their name instead, so that they
+find their rows on any browser."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
+import uuid
+from .config import settings
+
+if TYPE_CHECKING:
+    from flask import Flask, Response
+
+USER_COOKIE = 'adsorbase_user'
+
+# The id is kept for a year, as it gives access to the rows of the user
+_COOKIE_MAX_AGE = 365 * 24 * 3600
+
+
+def user_id(cookies: Mapping[str, str], headers: Mapping[str, str]) -> str | None:
+    """User of a request, given its cookies and headers, or None if the
+    app is not shared between users."""
+    if not settings['multi_user']:
+        return None
+    if settings['user_header']:
+        name = settings['user_header'].lower()
+        return next((value for key, value in headers.items()
+                     if key.lower() == name and value), None)
+    return cookies.get(USER_COOKIE) or None
+
+
+def _set_user_cookie(response: Response) -> Response:
+    from flask import request
+
+    if settings['multi_user'] and not settings['user_header'] and \
+            USER_COOKIE not in request.cookies:
+        response.set_cookie(USER_COOKIE, uuid.uuid4().hex,
+                            max_age=_COOKIE_MAX_AGE, httponly=True,
+                            samesite='Lax', secure=request.is_secure)
+    return response
+
+
+def register_user_cookie(server: Flask) -> None:
+    """Give an id to the browsers without one."""
+    server.after_request(_set_user_cookie)
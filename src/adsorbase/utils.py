@@ -1,17 +1,45 @@
 import pandas as pd
 from pathlib import Path
 import importlib.resources as resources
+import hashlib
+import io
+import itertools
+import os
+import shutil
+import threading
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from functools import cache
+import numpy as np
 from numpy import nan
+from .config import settings
+from .index import SortedColumnIndex, column_values
+from .layers import LayeredData
+from .ranking import pareto_front, weighted_scores
+from .stats import GroupAggregates, statistics, summarize
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 _PACKAGE_DATA = 'adsorbase.data'
 _DATABASE_CSV = 'adsorbents.csv'
 _CUSTOM_CSV = 'custom.csv'
+_LOCK_SUFFIX = '.lock'
+
+# Number of appended rows after which the journal of a binary storage, or
+# the WAL of SQLite, is compacted
+_COMPACT_EVERY = 1000
 
 
 def load_adsorbents_csv(filename: str) -> pd.DataFrame:
     """Read the default CSV file bundled within the adsorbase.data package."""
     with resources.files(_PACKAGE_DATA).joinpath(filename).open('r', encoding='utf-8') as file:
-        return pd.read_csv(file)
+        return pd.read_csv(file, dtype=_schema())
 
 
 def _read_csv_headers(filename: str) -> list[str]:
@@ -20,6 +48,51 @@ def _read_csv_headers(filename: str) -> list[str]:
         return file.readline().strip().split(",")
 
 
+@cache
+def _column_titles() -> list[str]:
+    """Columns of the database, as in the header of the default CSV file."""
+    return _read_csv_headers(_DATABASE_CSV)
+
+
+@cache
+def _schema() -> dict[str, object]:
+    """Types of the columns in memory. The types of adsorbent are a few
+    values repeated on every row, so they are categorical, and the measures
+    have at most 4 significant digits, well within the 7 of float32, so they
+    are written back with the same decimals. Missing measures are NaN.
+
+    Names have the default string type, `str` from pandas 3 and object
+    before, as converting to the 'str' alias turns missing values into
+    strings on pandas 2."""
+    columns = _column_titles()
+    return {columns[0]: pd.Series(dtype='str').dtype, columns[1]: 'category',
+            **dict.fromkeys(columns[2:], 'float32')}
+
+
+def _typed(data: pd.DataFrame) -> pd.DataFrame:
+    """`data` with the types of `_schema`, for the columns it has."""
+    # Column by column, as DataFrame.astype rebuilds the whole frame
+    changed = {col: data[col].astype(dtype) for col, dtype in _schema().items()
+               if col in data.columns and data[col].dtype != dtype}
+    return data.assign(**changed) if changed else data
+
+
+def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate `frames` with the types of `_schema`. Their categories are
+    merged first, as pandas falls back to strings for categorical columns
+    whose categories differ."""
+    frames = [_typed(frame) for frame in frames]
+    for col, dtype in _schema().items():
+        if dtype != 'category' or not all(col in frame for frame in frames):
+            continue
+        categories = sorted(set().union(
+            *(frame[col].cat.categories for frame in frames)))
+        frames = [frame if list(frame[col].cat.categories) == categories else
+                  frame.assign(**{col: frame[col].cat.set_categories(categories)})
+                  for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
 def _custom_csv_path() -> Path:
     """Use ~/.adsorbase/custom.csv for user-defined data."""
 
@@ -29,42 +102,861 @@ def _custom_csv_path() -> Path:
 
 
 def load_df() -> pd.DataFrame:
-    """Load the default adsorbent database of the package"""
-    return load_adsorbents_csv(_DATABASE_CSV)
+    """Load the default adsorbent database of the package. With a binary
+    storage, it is converted once and cached in ~/.adsorbase/cache/."""
+    fmt = settings['storage']
+    if fmt not in ('feather', 'parquet'):
+        return load_adsorbents_csv(_DATABASE_CSV)
+
+    source = resources.files(_PACKAGE_DATA).joinpath(_DATABASE_CSV)
+    stamp = _file_stamp(source) if isinstance(source, Path) else None
+    if stamp is None:
+        return load_adsorbents_csv(_DATABASE_CSV)
+
+    cache_path = _custom_csv_path().parent / 'cache' / \
+        f'{Path(_DATABASE_CSV).stem}-{stamp[0]}-{stamp[1]}.{fmt}'
+    if not cache_path.exists():
+        cache_path.parent.mkdir(exist_ok=True)
+        _write_binary(load_adsorbents_csv(_DATABASE_CSV), cache_path, fmt)
+    return _read_binary(cache_path, fmt)
+
+
+def _file_stamp(path: Path) -> tuple[int, int] | None:
+    """Modification time and size of a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _replace_file(path: Path, write) -> None:
+    """Atomically replace `path` with the file written by `write(tmp_path)`."""
+    tmp_path = path.with_name(
+        f'{path.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_binary(data: pd.DataFrame, path: Path, fmt: str) -> None:
+    data = data.reset_index(drop=True)
+    if fmt == 'feather':
+        # Uncompressed, so that it can be memory-mapped without copies
+        _replace_file(path, lambda tmp: data.to_feather(
+            tmp, compression='uncompressed'))
+    else:
+        _replace_file(path, lambda tmp: data.to_parquet(tmp, index=False))
+
+
+def _read_binary(path: Path, fmt: str) -> pd.DataFrame:
+    if fmt == 'feather':
+        from pyarrow import feather
+        table = feather.read_table(path, memory_map=True)
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, memory_map=True)
+    # Snapshots written by older versions have float64 columns
+    return _typed(table.to_pandas())
+
+
+class _CsvStorage:
+    """Custom database kept as custom.csv, to which new rows are appended."""
+
+    # Rows are appended in canonical form, so rewriting the file would only
+    # cost a full parse. It is compacted on demand, by compact_custom_csv
+    compact_every = None
+
+    def path(self) -> Path:
+        return _custom_csv_path()
+
+    def stamp(self):
+        return _file_stamp(self.path())
+
+    def load(self) -> pd.DataFrame | None:
+        path = self.path()
+        if not path.exists():
+            return None
+        return pd.read_csv(path, dtype=_schema())
+
+    def append(self, rows: pd.DataFrame) -> bool:
+        """Append rows to custom.csv, which is created from the default
+        database on the first insertion. If its header differs from
+        `column_titles`, it is compacted first so the appended rows line up
+        with the existing columns.
+
+        Returns False if the existing rows were rewritten as well."""
+        path = self.path()
+        exact = True
+        if not path.exists() or path.stat().st_size == 0:
+            with resources.files(_PACKAGE_DATA).joinpath(_DATABASE_CSV).open('rb') as src, \
+                    open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        elif not _has_canonical_header(path):
+            self.compact()
+            exact = False
+
+        newline = '' if _ends_with_newline(path) else '\n'
+        with open(path, 'a', encoding='utf-8', newline='') as file:
+            file.write(newline)
+            rows.to_csv(file, header=False, index=False,
+                        columns=_column_titles(), lineterminator='\n')
+
+        return exact and not newline
+
+    def compact(self) -> None:
+        """Rewrite custom.csv in canonical form, with exactly the columns of
+        `column_titles`. This repairs files edited by hand, e.g. with
+        reordered columns or a missing final newline."""
+        path = self.path()
+        if path.exists():
+            data = pd.read_csv(path).reindex(columns=_column_titles())
+            _replace_file(path, lambda tmp: data.to_csv(tmp, index=False))
+
+
+class _BinaryStorage:
+    """Custom database kept as a Feather or Parquet snapshot, which is
+    memory-mapped when loaded, and a CSV journal of the rows appended since
+    the last compaction. The snapshot is created from custom.csv if it
+    exists, so switching storage keeps the user data."""
+
+    compact_every = _COMPACT_EVERY
+
+    def __init__(self, fmt: str) -> None:
+        self.fmt = fmt
+
+    def path(self) -> Path:
+        return _custom_csv_path().with_suffix('.' + self.fmt)
+
+    def journal_path(self) -> Path:
+        custom_path = _custom_csv_path()
+        return custom_path.with_name(custom_path.stem + '.journal.csv')
+
+    def stamp(self):
+        return (_file_stamp(self.path()), _file_stamp(self.journal_path()))
+
+    def _snapshot_exists(self) -> bool:
+        if self.path().exists():
+            return True
+        csv_path = _custom_csv_path()
+        if not csv_path.exists():
+            return False
+        _write_binary(_typed(pd.read_csv(csv_path).reindex(columns=_column_titles())),
+                      self.path(), self.fmt)
+        return True
+
+    def load(self) -> pd.DataFrame | None:
+        if not self._snapshot_exists():
+            return None
 
+        data = _read_binary(self.path(), self.fmt)
+        journal = self.journal_path()
+        if journal.exists():
+            data = _concat([data, pd.read_csv(journal, dtype=_schema())])
+        return data
 
-def current_data() -> pd.DataFrame:
-    """Load custom data if it exists, otherwise fallback to default 
-    data. Looks for custom.csv next to the script that imports this module."""
+    def append(self, rows: pd.DataFrame) -> bool:
+        if not self._snapshot_exists():
+            _write_binary(load_df(), self.path(), self.fmt)
 
-    # Look for custom.csv in the same directory as the __main__ script
-    local_custom_path = _custom_csv_path()
-    if local_custom_path.exists():
-        return pd.read_csv(local_custom_path)
+        journal = self.journal_path()
+        with open(journal, 'a', encoding='utf-8', newline='') as file:
+            rows.to_csv(file, header=file.tell() == 0, index=False,
+                        columns=_column_titles(), lineterminator='\n')
+        return True
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot."""
+        data = self.load()
+        if data is not None:
+            _write_binary(data[_column_titles()], self.path(), self.fmt)
+            self.journal_path().unlink(missing_ok=True)
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+class _SqliteStorage:
+    """Custom database kept in an SQLite file in WAL mode, so that several
+    worker processes can read it while another one writes. Type,
+    temperature and pressure are indexed, for `query_data` to answer the
+    slider filters with SQL range predicates. The database is created from
+    custom.csv if it exists."""
+
+    table = 'adsorbents'
+    compact_every = _COMPACT_EVERY
+    indexed_columns = ('Type of Adsorbent', 'Conditions T [K]', 'Conditions P [bar]')
+
+    def path(self) -> Path:
+        return _custom_csv_path().with_suffix('.sqlite')
+
+    def stamp(self):
+        path = self.path()
+        return (_file_stamp(path), _file_stamp(path.with_name(path.name + '-wal')))
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path(), timeout=30)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _create(self, data: pd.DataFrame) -> None:
+        """Create the database with the rows of `data`. The file is written
+        under another name first, so readers never see it half created."""
+        def write(tmp_path):
+            connection = sqlite3.connect(tmp_path)
+            with connection:
+                columns = ', '.join(
+                    f'{_quote(col)} {"TEXT" if i < 2 else "REAL"}'
+                    for i, col in enumerate(_column_titles()))
+                connection.execute(f'CREATE TABLE {self.table} ({columns})')
+                for col in self.indexed_columns:
+                    connection.execute(
+                        f'CREATE INDEX {_quote("idx " + col)} ON {self.table} ({_quote(col)})')
+                self._insert(connection, data)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.close()
+
+        _replace_file(self.path(), write)
+
+    def _insert(self, connection: sqlite3.Connection, rows: pd.DataFrame) -> None:
+        columns = _column_titles()
+        # The float32 values are written from their shortest decimal form,
+        # e.g. 6.9 rather than 6.900000095367432, so that the SQL ranges
+        # select them like the other storages
+        rows = rows[columns].assign(**{
+            col: rows[col].astype(str).astype(np.float64)
+            for col in columns[2:] if rows[col].dtype == np.float32}).astype(object)
+        placeholders = ', '.join('?' * len(columns))
+        connection.executemany(
+            f'INSERT INTO {self.table} VALUES ({placeholders})',
+            rows.where(rows.notna(), None).itertuples(index=False, name=None))
+
+    def _database_exists(self) -> bool:
+        if self.path().exists():
+            return True
+        csv_path = _custom_csv_path()
+        if not csv_path.exists():
+            return False
+        self._create(pd.read_csv(csv_path))
+        return True
+
+    def load(self) -> pd.DataFrame | None:
+        if not self._database_exists():
+            return None
+        return _typed(self.query({}))
+
+    def query(self, ranges: dict[str, tuple[float, float]], hidden_types=None,
+              columns: list[str] | None = None) -> pd.DataFrame:
+        """Rows with values within `ranges` and a type not in `hidden_types`"""
+        conditions, params = [], []
+        for col, (low, high) in ranges.items():
+            conditions.append(f'{_quote(col)} BETWEEN ? AND ?')
+            params += [float(low), float(high)]
+        if hidden_types:
+            conditions.append(
+                f'{_quote("Type of Adsorbent")} NOT IN ({", ".join("?" * len(hidden_types))})')
+            params += list(hidden_types)
+
+        sql = f'SELECT {", ".join(map(_quote, columns or _column_titles()))} FROM {self.table}'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY rowid'
+
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+    def append(self, rows: pd.DataFrame) -> bool:
+        if not self._database_exists():
+            self._create(load_df())
+
+        with closing(self._connect()) as connection, connection:
+            self._insert(connection, rows)
+        return True
+
+    def compact(self) -> None:
+        """Move the WAL into the database and refresh the query planner
+        statistics."""
+        if self.path().exists():
+            with closing(self._connect()) as connection:
+                connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                connection.execute('PRAGMA optimize')
+
+
+def _storage() -> _CsvStorage | _BinaryStorage | _SqliteStorage:
+    """Storage of the custom database selected by the `storage` setting."""
+    fmt = settings['storage']
+    if fmt == 'csv':
+        return _CsvStorage()
+    if fmt == 'sqlite':
+        return _SqliteStorage()
+    return _BinaryStorage(fmt)
+
+
+def _read_current_data() -> pd.DataFrame:
+    """Load the custom database if it exists, otherwise fallback to default data."""
+    data = _storage().load()
+    if data is not None:
+        return data
 
     return load_df()
 
 
-def insert_into_csv(name, ads_type, BET, Pore, Ads, T, P) -> None:
-    """Insert a new adsorbent row into custom.csv"""
+class _DatasetStore:
+    """Process-wide cache of the current dataset.
+
+    The data is parsed once and shared by every caller. It is reloaded when
+    the modification time or size of the custom database files change, or
+    when the cache is explicitly invalidated. Each reload increments `version`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._df: pd.DataFrame | None = None
+        self._index: SortedColumnIndex | None = None
+        self._aggregates: GroupAggregates | None = None
+        self._stamp: tuple[int, int] | None = None
+        self.version = 0
+
+    def get(self) -> pd.DataFrame:
+        # Stat before parsing, so a write racing with the read triggers
+        # another reload on the next call rather than being missed
+        stamp = _storage().stamp()
+        with self._lock:
+            if self._df is None or stamp != self._stamp:
+                with metrics.loading():
+                    self._df = _read_current_data()
+                self._index = None
+                self._aggregates = None
+                self._stamp = stamp
+                self.version += 1
+            return self._df
+
+    def get_indexed(self) -> tuple[pd.DataFrame, SortedColumnIndex]:
+        """Current dataset along with its sorted column index, built on first
+        use and extended incrementally when rows are appended."""
+        data = self.get()
+        with self._lock:
+            if self._df is data and self._index is not None:
+                return data, self._index
+
+        with metrics.loading():
+            index = SortedColumnIndex(data, _column_titles()[2:])
+        with self._lock:
+            if self._df is data:
+                self._index = index
+        return data, index
+
+    def get_aggregates(self) -> tuple[pd.DataFrame, GroupAggregates]:
+        """Current dataset along with the summaries of its adsorbent types,
+        computed on first use and updated when rows are appended."""
+        data = self.get()
+        with self._lock:
+            if self._df is data and self._aggregates is not None:
+                return data, self._aggregates
+
+        aggregates = GroupAggregates(data, 'Type of Adsorbent')
+        with self._lock:
+            if self._df is data:
+                if self._aggregates is None:
+                    self._aggregates = aggregates
+                aggregates = self._aggregates
+        return data, aggregates
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._df = None
+            self._index = None
+            self._aggregates = None
+
+    def appended(self, rows: pd.DataFrame, before, after) -> None:
+        """Record rows appended to the custom database by this process, to
+        avoid parsing it again if nobody else modified it meanwhile."""
+        with self._lock:
+            if self._df is not None and self._stamp == before:
+                self._df = _concat([self._df, rows])
+                if self._index is not None:
+                    self._index = self._index.extended(rows)
+                if self._aggregates is not None:
+                    self._aggregates = self._aggregates.extended(self._df, rows)
+                self._stamp = after
+                self.version += 1
+            else:
+                self._df = None
+                self._index = None
+                self._aggregates = None
+
+
+_store = _DatasetStore()
+_appends_since_compaction = 0
+
+# Versions of the overlays, unique across users
+_overlay_versions = itertools.count(1)
+
+
+class _OverlayStore:
+    """Rows added by each user with the `multi_user` setting, kept apart
+    from the shared database, in one CSV file per user in
+    ~/.adsorbase/users/.
+
+    Overlays are parsed on first use and cached along with their sorted
+    column index, for the `max_users` most recent users. They are reloaded
+    when their file changes."""
+
+    def __init__(self, max_users: int = 1000) -> None:
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._overlays: OrderedDict[str, tuple] = OrderedDict()
+
+    def path(self, user: str) -> Path:
+        # Hashed, as ids come from cookies or headers
+        name = hashlib.sha256(user.encode('utf-8')).hexdigest()[:32]
+        return _custom_csv_path().parent / 'users' / f'{name}.csv'
+
+    def get(self, user: str) -> tuple[pd.DataFrame, SortedColumnIndex, int] | None:
+        """Rows of `user`, their index and their version, or None if they
+        did not add any."""
+        path = self.path(user)
+        stamp = _file_stamp(path)
+        if stamp is None:
+            return None
+        with self._lock:
+            cached = self._overlays.get(user)
+            if cached is not None and cached[0] == stamp:
+                self._overlays.move_to_end(user)
+                return cached[1]
+
+        data = pd.read_csv(path, dtype=_schema())
+        overlay = None
+        if len(data):
+            overlay = (data, SortedColumnIndex(data, _column_titles()[2:]),
+                       next(_overlay_versions))
+        with self._lock:
+            self._overlays[user] = (stamp, overlay)
+            self._overlays.move_to_end(user)
+            while len(self._overlays) > self.max_users:
+                self._overlays.popitem(last=False)
+        return overlay
+
+    def append(self, user: str, rows: pd.DataFrame) -> None:
+        path = self.path(user)
+        path.parent.mkdir(exist_ok=True)
+        with _locked_custom_data(), \
+                open(path, 'a', encoding='utf-8', newline='') as file:
+            rows.to_csv(file, header=file.tell() == 0, index=False,
+                        columns=_column_titles(), lineterminator='\n')
+
+    def compact(self) -> None:
+        """Rewrite the files of every user in canonical form, like
+        custom.csv with the csv storage."""
+        users = _custom_csv_path().parent / 'users'
+        for path in sorted(users.glob('*.csv')):
+            with _locked_custom_data():
+                data = pd.read_csv(path).reindex(columns=_column_titles())
+                _replace_file(path, lambda tmp: data.to_csv(tmp, index=False))
+        with self._lock:
+            self._overlays.clear()
+
+
+_overlays = _OverlayStore()
+
+
+def _overlay(user: str | None) -> tuple[pd.DataFrame, SortedColumnIndex, int] | None:
+    return _overlays.get(user) if user else None
+
+
+def current_data(user: str | None = None) -> pd.DataFrame | LayeredData:
+    """Return the current dataset: custom data if it exists, otherwise the
+    default data. With a `user` who added rows with the `multi_user`
+    setting, these follow the shared rows in a `LayeredData`.
+
+    The returned data is shared between all callers and must be treated
+    as read-only. Filter it or copy it before making any modification."""
+    data = _store.get()
+    overlay = _overlay(user)
+    return data if overlay is None else LayeredData(data, overlay[0])
+
+
+def data_version(user: str | None = None) -> tuple[int, int]:
+    """Versions of the current dataset and of the rows of `user`, which
+    change whenever they are reloaded."""
+    _store.get()
+    overlay = _overlay(user)
+    return (_store.version, 0 if overlay is None else overlay[2])
+
+
+@contextmanager
+def _locked_custom_data():
+    """Hold an exclusive lock on the custom database, shared between processes."""
+    lock_path = _custom_csv_path().with_suffix(_LOCK_SUFFIX)
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def compact_custom_csv() -> None:
+    """Compact the custom database. custom.csv is rewritten in canonical
+    form, with exactly the columns of `column_titles`, which repairs files
+    edited by hand. With a binary storage, the journal of appended rows is
+    folded into the snapshot. The rows added by each user with the
+    `multi_user` setting are rewritten in canonical form too."""
+    global _appends_since_compaction
+
+    with _locked_custom_data():
+        _storage().compact()
+        _store.invalidate()
+        _appends_since_compaction = 0
+    _overlays.compact()
+
+
+def _has_canonical_header(path: Path) -> bool:
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.readline().strip().split(',') == _column_titles()
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with open(path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            return True
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b'\n'
+
+
+def _append_rows(rows: pd.DataFrame, user: str | None = None) -> None:
+    """Append rows to the custom database without rewriting its existing
+    content, and compact it every `compact_every` rows of its storage, if
+    set. With a `user`, they are appended to their own rows instead."""
+    global _appends_since_compaction
+
+    if user:
+        _overlays.append(user, rows)
+        return
+
+    storage = _storage()
+    with _locked_custom_data():
+        before = storage.stamp()
+        exact = storage.append(rows)
+        after = storage.stamp()
+
+        if exact:
+            _store.appended(rows, before, after)
+        else:
+            _store.invalidate()
+
+        if storage.compact_every is None:
+            return
+        _appends_since_compaction += len(rows)
+        if _appends_since_compaction >= storage.compact_every:
+            storage.compact()
+            _store.invalidate()
+            _appends_since_compaction = 0
+
+
+def insert_into_csv(name, ads_type, BET, Pore, Ads, T, P, user: str | None = None) -> None:
+    """Append a new adsorbent row to the custom database, or to the rows of
+    `user` if given"""
     num_data = [BET, Pore, Ads, T, P]
 
     num_data = [nan if x is None else x for x in num_data]
 
     new_data = pd.DataFrame(
         [[name, ads_type] + num_data],
-        columns=column_titles
+        columns=_column_titles()
     )
-    updated = pd.concat([current_data(), new_data], ignore_index=True)
+    _append_rows(new_data, user)
+
+
+def _query_ranges(t_range, p_range, x_col, y_col, x_range, y_range) -> dict[str, tuple[float, float]]:
+    """Column ranges selected by the sliders and the zoom window. The axes
+    are always included, to leave out the rows with missing values."""
+    ranges: dict[str, tuple[float, float]] = {}
+    for col, bounds in (('Conditions T [K]', t_range),
+                        ('Conditions P [bar]', p_range),
+                        (x_col, x_range),
+                        (y_col, y_range)):
+        if col is None or (not bounds and col not in (x_col, y_col)):
+            continue
+        low, high = sorted(bounds) if bounds else (-np.inf, np.inf)
+        if col in ranges:  # Same column on both axes
+            low, high = max(low, ranges[col][0]), min(high, ranges[col][1])
+        ranges[col] = (low, high)
+
+    return ranges
+
+
+def _without_types(data, rows: np.ndarray, hidden_types) -> np.ndarray:
+    """`rows` positions of `data` whose type is not in `hidden_types`"""
+    if not hidden_types:
+        return rows
+    types = data['Type of Adsorbent'].iloc[rows]
+    return rows[~types.isin(hidden_types).to_numpy()]
+
+
+def query_rows(t_range=None, p_range=None,
+               x_col: str | None = None, y_col: str | None = None,
+               x_range=None, y_range=None,
+               hidden_types=None, user: str | None = None
+               ) -> tuple[pd.DataFrame | LayeredData, np.ndarray]:
+    """Rows of the current data of `user` visible on the graph, found with
+    the sorted column indexes.
+
+    Rows are kept if their temperature and pressure lie within `t_range` and
+    `p_range`, if they have a value for the `x_col` and `y_col` axes within
+    the zoom window `x_range` and `y_range`, and if their type is not in
+    `hidden_types`. Any criterion set to None is ignored. Bounds are
+    compared in the precision of the columns.
+
+    Returns the current data along with the sorted positions of the selected
+    rows, so that the cost depends on the number of matches rather than on
+    the size of the database."""
+    data, index = _store.get_indexed()
+    ranges = _query_ranges(t_range, p_range, x_col, y_col, x_range, y_range)
+    rows = index.query(ranges)
+
+    # The rows of the user are looked up in their own index, and follow
+    # the shared ones
+    overlay = _overlay(user)
+    if overlay is not None:
+        overlay_data, overlay_index, _ = overlay
+        rows = np.concatenate([rows, overlay_index.query(ranges) + len(data)])
+        data = LayeredData(data, overlay_data)
+
+    rows = _without_types(data, rows, hidden_types)
+    metrics.count_rows(len(rows))
+    return data, rows
+
+
+def query_data(t_range=None, p_range=None,
+               x_col: str | None = None, y_col: str | None = None,
+               x_range=None, y_range=None, hidden_types=None,
+               columns: list[str] | None = None,
+               user: str | None = None) -> pd.DataFrame:
+    """Rows of the custom database selected like `query_rows`, restricted
+    to `columns` if given, followed by those of `user`.
+
+    With the sqlite storage, the filters run as SQL range predicates in the
+    database, without loading it whole. Otherwise, they run on the current
+    data with `query_rows`."""
+    columns = columns or _column_titles()
+    storage = _storage()
+    if isinstance(storage, _SqliteStorage) and storage.path().exists():
+        ranges = _query_ranges(t_range, p_range, x_col, y_col, x_range, y_range)
+        selected = _typed(storage.query(ranges, hidden_types, columns))
+        overlay = _overlay(user)
+        if overlay is not None:
+            overlay_data, overlay_index, _ = overlay
+            rows = _without_types(overlay_data, overlay_index.query(ranges),
+                                  hidden_types)
+            selected = _concat([selected, overlay_data[columns].iloc[rows]])
+        metrics.count_rows(len(selected))
+        return selected
+
+    data, rows = query_rows(t_range, p_range, x_col, y_col,
+                            x_range, y_range, hidden_types, user)
+    return data[columns].iloc[rows]
+
+
+def type_statistics(x_col: str, y_col: str, t_range=None, p_range=None,
+                    x_range=None, y_range=None, hidden_types=None,
+                    user: str | None = None) -> pd.DataFrame:
+    """Statistics of each adsorbent type over the points of the graph,
+    selected like `query_rows`: their number, the minimum, maximum, mean
+    and median of `x_col` and `y_col`, and the correlation coefficient
+    between them. Indexed by type, in the order of the graph traces.
+
+    When every point of the database is selected, they come from summaries
+    kept up to date as rows are appended. Otherwise, they are computed on
+    the selected rows."""
+    data, rows = query_rows(t_range, p_range, x_col, y_col,
+                            x_range, y_range, hidden_types, user)
+    types = trace_types(data, rows)
+
+    base, aggregates = _store.get_aggregates()
+    if data is base:
+        with metrics.loading():
+            summary = aggregates.summary(x_col, y_col)
+        summary = summary.drop(list(hidden_types or []), errors='ignore')
+        # The selection is a subset of the summarized rows, so it is all of
+        # them if it has as many
+        if summary['n'].sum() == len(rows):
+            return statistics(summary.reindex(types))
+
+    summary = summarize(data['Type of Adsorbent'].iloc[rows],
+                        column_values(data[x_col].iloc[rows]),
+                        column_values(data[y_col].iloc[rows]))
+    return statistics(summary.reindex(types))
+
+
+def _criteria_values(data, rows: np.ndarray, columns: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Positions of the `rows` having a value in all of `columns`, and
+    these values, one column each."""
+    values = np.column_stack([column_values(data[col].iloc[rows]) for col in columns])
+    complete = ~np.isnan(values).any(axis=1)
+    return rows[complete], values[complete]
+
+
+def pareto_rows(columns: list[str] | None = None, t_range=None, p_range=None,
+                hidden_types=None, user: str | None = None
+                ) -> tuple[pd.DataFrame | LayeredData, np.ndarray]:
+    """Current data of `user` along with the sorted positions of the rows on
+    the Pareto front of `columns` (by default `axis_options`), among those
+    selected like `query_rows`: the rows no other one equals or exceeds on
+    every column while exceeding it on one. Rows missing one of the columns
+    are left out."""
+    columns = list(columns or _column_titles()[2:5])
+    data, rows = query_rows(t_range, p_range, hidden_types=hidden_types, user=user)
+    rows, values = _criteria_values(data, rows, columns)
+    return data, rows[pareto_front(values)]
+
+
+def rank_adsorbents(weights: dict[str, float] | None = None, t_range=None,
+                    p_range=None, hidden_types=None, user: str | None = None,
+                    limit: int | None = None) -> pd.DataFrame:
+    """Adsorbents selected like `query_rows`, best first, ranked by the sum
+    of their values in the columns of `weights` (by default `axis_options`,
+    weighted equally), each scaled between 0 and 1 over the selection and
+    multiplied by its weight. A negative weight favors the lower values of
+    its column. Rows missing one of these columns are left out. Raises a
+    ValueError if `weights` names other columns.
+
+    Returned with their `Score`, and whether they are on the `Pareto front`
+    of these columns, lower values being better for negative weights. The
+    front holds the best adsorbent of any weighting, so it is the shortlist
+    whatever the weights. Indexed by the positions of the rows in the
+    current data, `limit` rows at most."""
+    weights = {col: weight for col, weight in
+               (weights or dict.fromkeys(_column_titles()[2:5], 1)).items() if weight}
+    if not weights:
+        raise ValueError('rank_adsorbents needs a nonzero weight')
+    unknown = [col for col in weights if col not in _column_titles()[2:5]]
+    if unknown:
+        raise ValueError(f'Cannot rank adsorbents by {unknown}, '
+                         'expected columns of axis_options')
+    columns = list(weights)
+    signs = np.sign(list(weights.values()))
+
+    data, rows = query_rows(t_range, p_range, hidden_types=hidden_types, user=user)
+    rows, values = _criteria_values(data, rows, columns)
+    scores = weighted_scores(values, list(weights.values()))
+    front = pareto_front(values * signs.astype(values.dtype))
+
+    order = np.argsort(-scores, kind='stable')[:limit]
+    return data.iloc[rows[order]].assign(
+        **{'Score': scores[order], 'Pareto front': front[order]})
+
+
+def sample_rows(data: pd.DataFrame, rows: np.ndarray, budget: int) -> np.ndarray:
+    """Stratified sample of about `budget` of the `rows` positions.
+
+    Each adsorbent type keeps a share of the budget proportional to its
+    number of rows, and at least one row. Rows are picked by a fixed
+    pseudo-random priority, so the sample is deterministic and changes little
+    between overlapping selections."""
+    if len(rows) <= budget:
+        return rows
+
+    codes, _ = pd.factorize(data['Type of Adsorbent'].iloc[rows],
+                            use_na_sentinel=False)
+    counts = np.bincount(codes)
+    quotas = np.maximum(1, budget * counts // len(rows))
+
+    # Pseudo-random but fixed priority of each row (Knuth multiplicative hash)
+    keys = (rows.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2**32)
+    order = np.lexsort((keys, codes))
+    sorted_codes = codes[order]
+    ranks = np.arange(len(order)) - np.searchsorted(sorted_codes, sorted_codes)
+
+    return np.sort(rows[order[ranks < quotas[sorted_codes]]])
+
+
+def trace_types(data: pd.DataFrame, rows: np.ndarray | None = None) -> list[str]:
+    """Adsorbent types in the order of the graph traces, of the `rows`
+    positions of `data` if given."""
+    types = data['Type of Adsorbent']
+    if rows is not None:
+        types = types.iloc[rows]
+    return list(pd.unique(types))
+
+
+def validate_rows(data: pd.DataFrame) -> pd.Series:
+    """Check a batch of adsorbents with the same rules as the input form.
+
+    Returns the error message of each row, or an empty string for valid rows.
+    A row is valid if it has a name and a type, at least two of the BET surface
+    area, pore volume and adsorption capacity, and only numeric values in the
+    numeric columns."""
+    columns = _column_titles()
+    errors = pd.Series('', index=data.index, dtype=object)
+
+    for col in columns[:2]:
+        text = data[col].astype('string').str.strip()
+        missing = text.isna() | (text == '')
+        errors[missing] += f'missing {col}; '
+
+    numeric = data[columns[2:]].apply(pd.to_numeric, errors='coerce')
+    for col in columns[2:]:
+        given = data[col].notna() & (data[col].astype('string').str.strip() != '')
+        errors[given & numeric[col].isna()] += f'non-numeric {col}; '
+
+    too_few = numeric[columns[2:5]].notna().sum(axis=1) < 2
+    errors[too_few] += 'at least two of ' + \
+        ', '.join(columns[2:5]) + ' required; '
+
+    return errors.str.rstrip('; ')
+
+
+def bulk_insert(data: pd.DataFrame | str | Path | io.IOBase,
+                user: str | None = None) -> pd.Series:
+    """Insert many adsorbents at once into custom.csv, or into the rows of
+    `user` if given.
+
+    `data` is either a DataFrame or a path to (or file object of) a CSV file,
+    with the same columns as `column_titles`. All rows are validated with
+    `validate_rows`, and the valid ones are appended in a single write.
+    Returns the error messages of the rejected rows, indexed like `data`."""
+    if not isinstance(data, pd.DataFrame):
+        data = pd.read_csv(data)
+    columns = _column_titles()
+
+    missing_columns = [col for col in columns if col not in data.columns]
+    if missing_columns:
+        raise ValueError(f'Missing columns: {", ".join(missing_columns)}')
+
+    errors = validate_rows(data)
+    valid = errors == ''
+
+    rows = data.loc[valid, columns].reset_index(drop=True)
+    rows[columns[:2]] = rows[columns[:2]].astype(str).apply(
+        lambda col: col.str.strip())
+    rows[columns[2:]] = rows[columns[2:]].apply(
+        pd.to_numeric, errors='coerce')
+    if len(rows):
+        _append_rows(rows, user)
+
+    return errors[~valid]
 
-    custom_path = _custom_csv_path()
-    custom_path.parent.mkdir(parents=True, exist_ok=True)
-    updated.to_csv(custom_path, index=False)
 
+def __getattr__(name: str):
+    # The columns are read from the default database on first use, so that
+    # importing this module does not touch the filesystem
+    if name == 'column_titles':
+        return _column_titles()
+    if name == 'axis_options':
+        return _column_titles()[2:5]
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-column_titles = _read_csv_headers(_DATABASE_CSV)
-axis_options = column_titles[2:5]
 
 if __name__ == '__main__':
     print(load_df())
-    print(axis_options)
+    print(_column_titles()[2:5])
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from hypothesis import given, strategies as st
+from hypothesis.extra.numpy import arrays
+from adsorbase.index import SortedColumnIndex
+
+COLUMNS = ['T', 'P']
+
+# float32 values with NaN, few distinct ones so that ties are common
+values = st.integers(1, 40).flatmap(lambda n: st.tuples(*(
+    arrays(np.float32, n, elements=st.one_of(
+        st.just(np.nan), st.sampled_from([0.1, 0.2, 1.3, 273.15, 298.15, 1e5])))
+    for _ in COLUMNS)))
+
+
+def frame(columns) -> pd.DataFrame:
+    return pd.DataFrame(dict(zip(COLUMNS, columns)))
+
+
+def brute_force_query(data: pd.DataFrame, ranges: dict) -> list[int]:
+    """Rows within the ranges, each bound matching the values it reads as"""
+    mask = np.ones(len(data), dtype=bool)
+    for col, (low, high) in ranges.items():
+        shown = np.array([float(str(value)) for value in data[col].to_numpy()])
+        mask &= (low <= shown) & (shown <= high)
+    return np.flatnonzero(mask).tolist()
+
+
+@given(values, st.integers(0, 40), st.integers(0, 40))
+def test_extended(columns, split, second_split):
+    data = frame(columns)
+    first, second = sorted((min(split, len(data)), min(second_split, len(data))))
+    index = SortedColumnIndex(data.iloc[:first], COLUMNS)
+    index = index.extended(data.iloc[first:second]).extended(data.iloc[second:])
+    rebuilt = SortedColumnIndex(data, COLUMNS)
+
+    assert index.n_rows == rebuilt.n_rows
+    for col in COLUMNS:
+        np.testing.assert_array_equal(index._values[col], rebuilt._values[col])
+        np.testing.assert_array_equal(index._sorted[col], rebuilt._sorted[col])
+        np.testing.assert_array_equal(index._order[col], rebuilt._order[col])
+
+
+@given(values, st.data())
+def test_query(columns, draw):
+    data = frame(columns)
+    # Bounds as shown to the user, which are float64 values not equal to
+    # the float32 values they stand for
+    shown = sorted({float(str(value)) for value in np.concatenate(columns)
+                    if not np.isnan(value)})
+    ranges = {}
+    for col in draw.draw(st.lists(st.sampled_from(COLUMNS), unique=True)):
+        if shown:
+            low, high = sorted(draw.draw(st.lists(
+                st.sampled_from(shown), min_size=2, max_size=2)))
+            ranges[col] = (low, high)
+
+    rows = SortedColumnIndex(data, COLUMNS).query(ranges)
+    assert rows.tolist() == brute_force_query(data, ranges)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from hypothesis import given, strategies as st
+from adsorbase.layers import LayeredData, _concat
+
+BASE = pd.DataFrame({
+    'Name': pd.Series(['ZIF-8', 'MOF-5', 'UiO-66', 'Zeolite 13X'], dtype='str'),
+    'Type of Adsorbent': pd.Categorical(['MOF', 'MOF', 'MOF', 'Zeolite']),
+    'Pore volume [cm³/g]': np.array([0.66, 1.04, np.nan, 0.3], dtype=np.float32),
+})
+OVERLAY = pd.DataFrame({
+    'Name': pd.Series(['HKUST-1', 'AC-1', 'APAB'], dtype='str'),
+    'Type of Adsorbent': pd.Categorical(['MOF', 'Carbon-Based', 'POP']),
+    'Pore volume [cm³/g]': np.array([0.75, np.nan, 1.2], dtype=np.float32),
+})
+LAYERS = LayeredData(BASE, OVERLAY)
+CONCATENATED = _concat([BASE, OVERLAY])
+
+
+def as_strings(taken):
+    """Rows with their types as strings, as each layer has its own categories"""
+    return taken.astype({'Type of Adsorbent': str}) if isinstance(taken, pd.DataFrame) \
+        else taken.astype(str)
+
+
+@given(st.lists(st.integers(0, len(CONCATENATED) - 1)))
+def test_take_positions(rows):
+    rows = np.array(rows, dtype=np.int64)
+    taken = LAYERS.iloc[rows]
+    pd.testing.assert_frame_equal(as_strings(taken), as_strings(CONCATENATED.iloc[rows]))
+    assert list(taken.index) == rows.tolist()
+
+
+@given(st.integers(-10, 10), st.integers(-10, 10),
+       st.integers(-3, 3).filter(bool))
+def test_take_slice(start, stop, step):
+    key = slice(start, stop, step)
+    pd.testing.assert_frame_equal(as_strings(LAYERS.iloc[key]),
+                                  as_strings(CONCATENATED.iloc[key]))
+
+
+@pytest.mark.parametrize('position', range(-len(CONCATENATED), len(CONCATENATED)))
+def test_take_row(position):
+    pd.testing.assert_series_equal(as_strings(LAYERS.iloc[position]),
+                                   as_strings(CONCATENATED.iloc[position]))
+
+
+def test_take_column():
+    rows = np.array([6, 0, 5])
+    taken = LAYERS['Type of Adsorbent'].iloc[rows]
+    assert taken.tolist() == ['POP', 'MOF', 'Carbon-Based']
+    assert isinstance(taken.dtype, pd.CategoricalDtype)
+    assert LAYERS['Pore volume [cm³/g]'].max() == np.float32(1.2)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st
+from hypothesis.extra.numpy import arrays
+from adsorbase import ranking, utils
+
+
+def brute_force_front(values: np.ndarray) -> np.ndarray:
+    """Points no other one equals or exceeds on every column while
+    exceeding it on one, by comparing every pair."""
+    at_least = (values[None, :, :] >= values[:, None, :]).all(axis=2)
+    better = (values[None, :, :] > values[:, None, :]).any(axis=2)
+    return ~(at_least & better).any(axis=1)
+
+
+# Few distinct values, so that ties and duplicated points are common
+points = st.integers(1, 3).flatmap(lambda ncols: arrays(
+    np.float32, st.tuples(st.integers(0, 60), st.just(ncols)),
+    elements=st.integers(-4, 4).map(float)))
+
+
+@given(points)
+def test_pareto_front(values):
+    assert ranking.pareto_front(values).tolist() == brute_force_front(values).tolist()
+
+
+@pytest.mark.parametrize('ncols', [2, 3])
+@pytest.mark.parametrize('correlation', [1, -1])
+def test_pareto_front_blocks(ncols, correlation):
+    # Several blocks of the 3D sweep, with large fronts when anticorrelated
+    rng = np.random.default_rng(0)
+    values = rng.random((3000, ncols))
+    values[:, 1] = correlation * values[:, 0] + rng.random(3000) / 10
+    assert ranking.pareto_front(values).tolist() == brute_force_front(values).tolist()
+
+
+def test_pareto_front_columns():
+    with pytest.raises(ValueError):
+        ranking.pareto_front(np.zeros((3, 4)))
+
+
+@given(arrays(np.float64, st.tuples(st.integers(1, 30), st.just(3)),
+              elements=st.one_of(st.just(np.nan), st.integers(0, 100).map(float))),
+       st.lists(st.integers(-3, 3).map(float), min_size=3, max_size=3))
+def test_weighted_scores(values, weights):
+    expected = np.zeros(len(values))
+    for k, weight in enumerate(weights):
+        column = values[:, k]
+        known = column[~np.isnan(column)]
+        low, high = (known.min(), known.max()) if len(known) else (np.nan, np.nan)
+        scaled = (column - low) / (high - low) if high > low else column - low
+        expected += weight * (scaled if weight >= 0 else scaled - 1)
+    np.testing.assert_allclose(ranking.weighted_scores(values, weights), expected)
+
+
+@pytest.mark.parametrize('weights', [{'Conditions T [K]': 1}, {'Unknown': 1}, {}])
+def test_rank_adsorbents_weights(weights):
+    with pytest.raises(ValueError):
+        utils.rank_adsorbents(weights or dict.fromkeys(utils.axis_options, 0))
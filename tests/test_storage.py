@@ -0,0 +1,91 @@
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+from adsorbase import run, utils
+from adsorbase.config import settings
+from adsorbase.layers import _concat
+
+requires_pyarrow = pytest.mark.skipif(
+    importlib.util.find_spec('pyarrow') is None, reason='requires pyarrow')
+STORAGES = ['csv', 'sqlite', pytest.param('feather', marks=requires_pyarrow),
+            pytest.param('parquet', marks=requires_pyarrow)]
+
+
+@pytest.fixture(params=STORAGES)
+def storage(request, tmp_path, monkeypatch):
+    """Storage of a custom database in an empty home directory"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setenv('USERPROFILE', str(tmp_path))
+    monkeypatch.setitem(settings, 'storage', request.param)
+    utils._store.invalidate()
+    yield request.param
+    utils._store.invalidate()
+
+
+def new_rows() -> pd.DataFrame:
+    """Rows with a new type, a non-ASCII name, missing values and values
+    which float32 cannot hold exactly"""
+    return pd.DataFrame(
+        [['Cu-BTC (HKUST-1) é', 'Brand-New', 1850.5, 0.1, 6.9, 298.15, 0.15],
+         ['AC, "activated"', 'Carbon-Based', None, 1.3, 2.2, 273.15, 1]],
+        columns=utils.column_titles)
+
+
+def reloaded() -> pd.DataFrame:
+    utils._store.invalidate()
+    return utils.current_data()
+
+
+def test_round_trip(storage):
+    default = utils.current_data()
+    assert utils.bulk_insert(new_rows()).empty
+    expected = _concat([default, utils._typed(new_rows())])
+
+    # Appended in memory, then read back from the files
+    pd.testing.assert_frame_equal(utils.current_data(), expected)
+    pd.testing.assert_frame_equal(reloaded(), expected)
+
+    utils.insert_into_csv('APAB', 'POP', 0.1, None, 3, 298.15, 1e-3)
+    expected = _concat([expected, utils._typed(pd.DataFrame(
+        [['APAB', 'POP', 0.1, np.nan, 3, 298.15, 1e-3]], columns=utils.column_titles))])
+    pd.testing.assert_frame_equal(utils.current_data(), expected)
+    pd.testing.assert_frame_equal(reloaded(), expected)
+
+    utils.compact_custom_csv()
+    pd.testing.assert_frame_equal(reloaded(), expected)
+
+
+def test_query_round_trip(storage):
+    utils.bulk_insert(new_rows())
+    utils._store.invalidate()
+    data, rows = utils.query_rows(t_range=(298.15, 298.15), p_range=(0.15, 0.15))
+    assert data['Name'].iloc[rows].tolist() == ['Cu-BTC (HKUST-1) é']
+    selected = utils.query_data(t_range=(298.15, 298.15), p_range=(0.15, 0.15))
+    assert selected['Name'].tolist() == ['Cu-BTC (HKUST-1) é']
+
+
+def test_user_round_trip(storage):
+    default = utils.current_data()
+    utils.bulk_insert(new_rows(), user='alice')
+
+    pd.testing.assert_frame_equal(reloaded(), default)
+    layers = utils.current_data('alice')
+    pd.testing.assert_frame_equal(
+        layers.iloc[np.arange(len(layers))],
+        _concat([default, utils._typed(new_rows())]), check_categorical=False)
+
+
+def test_compact_command(storage):
+    utils.bulk_insert(new_rows(), user='alice')
+    layers = utils.current_data('alice')
+    expected = layers.iloc[np.arange(len(layers))]
+
+    # Edited by hand, with reordered columns
+    path = utils._overlays.path('alice')
+    pd.read_csv(path)[utils.column_titles[::-1]].to_csv(path, index=False)
+    run.main(['compact', '-s', f'storage={storage}'])
+
+    assert pd.read_csv(path).columns.tolist() == utils.column_titles
+    pd.testing.assert_frame_equal(
+        utils.current_data('alice').iloc[np.arange(len(expected))], expected)
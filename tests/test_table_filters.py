@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from adsorbase.callbacks import _table_filter_mask
+
+DATA = pd.DataFrame({
+    'Name': pd.Series(['ZIF-8', 'MOF-13', 'UiO-66', 'Zeolite 13X', None], dtype='str'),
+    'Type of Adsorbent': pd.Categorical(['MOF', 'MOF', 'MOF', 'Zeolite', 'Zeolite']),
+    'Adsorption capacity [mmol/g]': np.array([6.9, 2.1, np.nan, 13, 0.5], dtype=np.float32),
+})
+ROWS = np.arange(len(DATA))
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('{Name} contains 13', [False, True, False, True, False]),
+    ('{Name} contains "zif"', [True, False, False, False, False]),
+    ('{Name} > N', [True, False, True, True, False]),
+    ('{Name} > 5', [True, True, True, True, False]),
+    ('{Type of Adsorbent} < 5', [False] * 5),
+    ('{Type of Adsorbent} = Zeolite', [False, False, False, True, True]),
+    ('{Adsorption capacity [mmol/g]} = 6.9', [True, False, False, False, False]),
+    ('{Adsorption capacity [mmol/g]} >= 2.1', [True, True, False, True, False]),
+    ('{Adsorption capacity [mmol/g]} contains 13', [False, False, False, True, False]),
+    ('{Adsorption capacity [mmol/g]} > abc', [True] * 5),
+    ('{Adsorption capacity [mmol/g]} = abc', [False] * 5),
+    ('{Adsorption capacity [mmol/g]} < 7 && {Type of Adsorbent} = MOF',
+     [True, True, False, False, False]),
+    ('{Unknown} > 1', [True] * 5),
+])
+def test_table_filter_mask(query, expected):
+    assert _table_filter_mask(DATA, ROWS, query).tolist() == expected
+
+
+def test_table_filter_mask_rows():
+    rows = np.array([3, 0])
+    assert _table_filter_mask(DATA, rows, '{Name} contains Z').tolist() == [True, True]
@@ -0,0 +1,43 @@
+"""The clientside callbacks of assets/ui.js against their reference
+implementations in adsorbase.callbacks"""
+
+from importlib import resources
+import json
+import shutil
+import subprocess
+import pytest
+from adsorbase import callbacks, utils
+
+AXES = [(None, None), *((x, y) for x in utils.axis_options for y in utils.axis_options)]
+
+# Runs ui.js with a window of its own, and prints the results of the calls
+# given as JSON on the command line
+_HARNESS = '''
+global.window = {};
+require(process.argv[1]);
+const functions = window.dash_clientside.adsorbase;
+const calls = JSON.parse(process.argv[2]);
+console.log(JSON.stringify(calls.map(([name, args]) => functions[name](...args))));
+'''
+
+
+def run_ui_js(calls: list) -> list:
+    node = shutil.which('node')
+    if node is None:
+        pytest.skip('node is not installed')
+    with resources.as_file(resources.files('adsorbase') / 'assets' / 'ui.js') as path:
+        result = subprocess.run([node, '-e', _HARNESS, str(path), json.dumps(calls)],
+                                capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_update_hover_dropdown():
+    # The page gives the columns offered on hover through the hover-columns store
+    columns = utils.column_titles[2:]
+    results = run_ui_js([['update_hover_dropdown', [x, y, columns]] for x, y in AXES])
+    assert results == [callbacks.update_hover_dropdown(x, y) for x, y in AXES]
+
+
+def test_clear_fields():
+    results = run_ui_js([['clear_fields', ['Added : ...']]])
+    assert results == [callbacks.clear_fields('Added : ...')]